@@ -5,28 +5,34 @@ Copyright (c) 2021 RadiaSoft LLC. All rights reserved
 import numpy as np
 import array
 import math
-import copy
+import functools
 from pykern.pkcollections import PKDict
 from pykern.pkdebug import pkdp
 import srwlib
 from srwlib import srwl
 import scipy.constants as const
 from scipy.interpolate import RectBivariateSpline, RegularGridInterpolator
-from scipy.interpolate import splrep, splev
+from scipy.interpolate import CubicSpline, make_interp_spline, splev, splrep
 from scipy.optimize import curve_fit
 from scipy.special import gamma
 from rsmath import lct as rslct
 from rslaser.utils.validator import ValidatorBase
 from rslaser.utils import srwl_uti_data as srwutil
-from rslaser.optics.element import ElementException, Element
+from rslaser.optics.element import (
+    ElementException,
+    Element,
+    _apply_lct_2d_xy,
+    _for_each_slice,
+    _lct_abcd_mat,
+)
 from rslaser.thermal import ThermoOptic
 
 _N_SLICE_DEFAULT = 50
 _N0_DEFAULT = 1.75
 _N2_DEFAULT = 0.001
 _CRYSTAL_DEFAULTS = PKDict(
-    n0=[_N0_DEFAULT for _ in range(_N_SLICE_DEFAULT)],
-    n2=[_N2_DEFAULT for _ in range(_N_SLICE_DEFAULT)],
+    n0=(_N0_DEFAULT,) * _N_SLICE_DEFAULT,
+    n2=(_N2_DEFAULT,) * _N_SLICE_DEFAULT,
     delta_n_array=None,
     delta_n=None,
     delta_n_mesh_extent=0.01,  # range [m] of delta_n mesh assuming azimuthal symmetry
@@ -62,6 +68,39 @@ _CRYSTAL_DEFAULTS = PKDict(
     pop_inversion_lambda_pump=532.0,  # [nm], pump laser operating wavelength
 )
 
+# below ln(float64 max) ~ 709.78, so e^x stays finite in the direct gain form
+_GAIN_DIRECT_MAX = 700.0
+# below ln(float32 max) ~ 88.72, so e^x & the fields scaled by it stay finite float32s
+_LOG_FLOAT32_MAX = 88.0
+
+# Wavelength-dependent cross-section [m^2] (P. F. Moulton, 1986), shared by all slices
+_CRYSTAL_CROSS_SECTION_DATA = (
+    np.array([600, 625, 650, 700, 750, 800, 850, 900, 950, 1000, 1025, 1050])
+    * (1.0e-9),
+    np.array(
+        [
+            0.0,
+            0.02,
+            0.075,
+            0.437,
+            0.845,
+            0.99,
+            0.815,
+            0.6,
+            0.415,
+            0.276,
+            0.255,
+            0.247,
+        ]
+    )
+    * (4.8e-23),
+)
+
+# cross_section_fn keeps its splrep tck type; calc_gain evaluates the same
+# not-a-knot interpolant with CubicSpline
+_CRYSTAL_CROSS_SECTION_TCK = splrep(*_CRYSTAL_CROSS_SECTION_DATA)
+_CRYSTAL_CROSS_SECTION_FN = CubicSpline(*_CRYSTAL_CROSS_SECTION_DATA)
+
 
 class Crystal(Element):
     """
@@ -83,8 +122,11 @@ class Crystal(Element):
         self._validate_params(params)
         self.params = params
 
+        n0 = np.asarray(params.n0, dtype=np.float64)
+        n2 = np.asarray(params.n2, dtype=np.float64)
+
         # Check if n2<0, throw an exception if true
-        if (np.array(params.n2) < 0.0).any():
+        if (n2 < 0.0).any():
             raise self._INPUT_ERROR(f"You've specified negative value(s) for n2")
 
         self.length = params.length
@@ -97,33 +139,60 @@ class Crystal(Element):
         self.l_scale = params.l_scale
         self.slice = []
 
+        # the pump parameters & transverse pump profile are the same for every slice
+        population_inversion = _population_inversion_params(params)
+        transverse_pump_profile = _pump_transverse_profile(population_inversion)
+
+        # params were validated above, so slices are built from them directly
         for j in range(self.nslice):
-            p = params.copy()
-            p.update(
-                PKDict(
-                    n0=params.n0[j],
-                    n2=params.n2[j],
-                    delta_n=params.delta_n_array[j]
-                    if params.delta_n_array is not None
-                    else None,
-                    length=params.length / params.nslice,
+            self.slice.append(
+                CrystalSlice._from_shared(
+                    params,
+                    n0=n0[j],
+                    n2=n2[j],
+                    delta_n=(
+                        params.delta_n_array[j]
+                        if params.delta_n_array is not None
+                        else None
+                    ),
                     slice_index=j,
+                    population_inversion=population_inversion,
+                    transverse_pump_profile=transverse_pump_profile,
                 )
             )
-            self.slice.append(CrystalSlice(params=p))
+
+        self._precompute_abcd()
+        self._thermo_optic = None
+
+    def _precompute_abcd(self):
+        # n0n2 ABCD matrix entries of all slices at once, stored on each slice
+        n0 = np.array([s.n0 for s in self.slice], dtype=np.float64)
+        n2 = np.array([s.n2 for s in self.slice], dtype=np.float64)
+        dz = np.array([s.length for s in self.slice], dtype=np.float64)
+        gamma = np.sqrt(n2 / n0)
+        cos_gdz = np.cos(gamma * dz)
+        B = dz * np.sinc(gamma * dz / np.pi)
+        C = -n0 * gamma * np.sin(gamma * dz)
+        for j, s in enumerate(self.slice):
+            s._abcd_n0n2 = PKDict(
+                key=(s.n0, s.n2, s.length),
+                A=cos_gdz[j],
+                B=B[j],
+                C=C[j],
+                D=cos_gdz[j],
+            )
 
     def _get_params(self, params):
         def _update_n0_and_n2(params_final, params, field):
             if len(params_final[field]) != params_final.nslice:
                 if not params.get(field):
                     # if no n0/n2 specified then we use default nlice times in array
-                    params_final[field] = [
+                    params_final[field] = (
                         PKDict(
                             n0=_N0_DEFAULT,
                             n2=_N2_DEFAULT,
-                        )[field]
-                        for _ in range(params_final.nslice)
-                    ]
+                        )[field],
+                    ) * params_final.nslice
                     return
                 raise self._INPUT_ERROR(
                     f"you've specified an {field} unequal length to nslice"
@@ -173,19 +242,20 @@ class Crystal(Element):
 
                 assert prop_type == "n0n2_srw", "ERROR -- Only implemented for n0n2_srw"
                 laser_pulse_copies = PKDict(
-                    n2_max=copy.deepcopy(laser_pulse),
-                    n2_0=copy.deepcopy(laser_pulse),
+                    n2_max=laser_pulse.shallow_wfr_copy(),
+                    n2_0=laser_pulse.shallow_wfr_copy(),
                 )
 
-                temp_crystal_slice = copy.deepcopy(s)
-                temp_crystal_slice.n2 = 0.0
+                # the n2 = 0 pass must leave the slice's population inversion untouched
+                pop_inversion_mesh = np.copy(s.pop_inversion_mesh)
+                laser_pulse_copies.n2_0 = s.propagate(
+                    laser_pulse_copies.n2_0, prop_type, calc_gain, override_n2=0.0
+                )
+                s.pop_inversion_mesh = pop_inversion_mesh
 
                 laser_pulse_copies.n2_max = s.propagate(
                     laser_pulse_copies.n2_max, prop_type, calc_gain
                 )
-                laser_pulse_copies.n2_0 = temp_crystal_slice.propagate(
-                    laser_pulse_copies.n2_0, prop_type, calc_gain
-                )
 
                 laser_pulse = laser_pulse.combine_n2_variation(
                     laser_pulse_copies,
@@ -221,8 +291,12 @@ class Crystal(Element):
         if method not in ("fenics", "analytical"):
             raise ValueError("'method' must be either 'fenics' or 'analytical'")
 
-        # Initialize a thermo-optic simulator object
-        TO_Sim = ThermoOptic(self, mesh_density)
+        # Initialize a thermo-optic simulator object, reusing its mesh & solvers across
+        # calls while the mesh inputs are unchanged
+        k = (mesh_density, self.length, self.radius)
+        if self._thermo_optic is None or self._thermo_optic.key != k:
+            self._thermo_optic = PKDict(key=k, sim=ThermoOptic(self, mesh_density))
+        TO_Sim = self._thermo_optic.sim
 
         # Set evaluation points for thermo-optic calculations
         n_radpts = 100  # no. of radial points at which to extract data
@@ -259,6 +333,7 @@ class Crystal(Element):
             for s in self.slice:
                 s.n0 = n0[s.slice_index]
                 s.n2 = n2[s.slice_index]
+            self._precompute_abcd()
 
         return n0, n2, full_ABCD
 
@@ -300,15 +375,63 @@ class CrystalSlice(Element):
     _DEFAULTS = _CRYSTAL_DEFAULTS
     _INPUT_ERROR = ElementException
 
-    def __init__(self, params=None):
+    def __init__(self, params=None, transverse_pump_profile=None):
         params = self._get_params(params)
         self._validate_params(params)
-        self.length = params.length
+        self._init_slice(
+            params,
+            params.length,
+            params.n0,
+            params.n2,
+            params.delta_n,
+            params.slice_index,
+            None,
+            transverse_pump_profile,
+        )
+
+    @classmethod
+    def _from_shared(
+        cls,
+        params,
+        n0,
+        n2,
+        delta_n,
+        slice_index,
+        population_inversion=None,
+        transverse_pump_profile=None,
+    ):
+        # slice of a Crystal whose params are already validated: the shared
+        # params (and pump parameters) are neither copied nor validated again
+        s = cls.__new__(cls)
+        s._init_slice(
+            params,
+            params.length / params.nslice,
+            n0,
+            n2,
+            delta_n,
+            slice_index,
+            population_inversion,
+            transverse_pump_profile,
+        )
+        return s
+
+    def _init_slice(
+        self,
+        params,
+        length,
+        n0,
+        n2,
+        delta_n,
+        slice_index,
+        population_inversion,
+        transverse_pump_profile,
+    ):
+        self.length = length
         self.nslice = params.nslice
-        self.slice_index = params.slice_index
-        self.n0 = params.n0
-        self.n2 = params.n2
-        self.delta_n = params.delta_n
+        self.slice_index = slice_index
+        self.n0 = n0
+        self.n2 = n2
+        self.delta_n = delta_n
         self.l_scale = params.l_scale
         # self.pop_inv = params._pop_inv
         self.A = params.A
@@ -318,36 +441,20 @@ class CrystalSlice(Element):
         self.radial_n2_factor = params.radial_n2_factor
         self.prop_type = "srw"  # Default prop_type for element.py propagation
 
-        # Wavelength-dependent cross-section (P. F. Moulton, 1986)
-        wavelength = np.array(
-            [600, 625, 650, 700, 750, 800, 850, 900, 950, 1000, 1025, 1050]
-        ) * (1.0e-9)
-        cross_section = np.array(
-            [
-                0.0,
-                0.02,
-                0.075,
-                0.437,
-                0.845,
-                0.99,
-                0.815,
-                0.6,
-                0.415,
-                0.276,
-                0.255,
-                0.247,
-            ]
-        ) * (4.8e-23)
-        self.cross_section_fn = splrep(wavelength, cross_section)
+        # Wavelength-dependent cross-section (P. F. Moulton, 1986), a splrep tck
+        self.cross_section_fn = _CRYSTAL_CROSS_SECTION_TCK
+        self._cross_sections = {}  # cross_section_fn values [m^2] by wavelength [m]
 
         # create mesh for delta_n array
         self.delta_n_xstart = -params.delta_n_mesh_extent
         self.delta_n_xfin = params.delta_n_mesh_extent
 
         # 2d mesh of excited state density (sigma)
-        self._initialize_excited_states_mesh(params, params.nslice)
+        self._initialize_excited_states_mesh(
+            params, params.nslice, population_inversion, transverse_pump_profile
+        )
 
-    def _left_pump(self, nslice, xv, yv):
+    def _left_pump(self, nslice):
 
         # z = distance from left of crystal to center of current slice (assumes all crystal slices have same length)
         z = self.length * (self.slice_index + 0.5)
@@ -359,7 +466,7 @@ class CrystalSlice(Element):
 
         return np.array((left_tuple,))
 
-    def _right_pump(self, nslice, xv, yv):
+    def _right_pump(self, nslice):
 
         # z = distance from right of crystal to center of current slice (assumes all crystal slices have same length)
         z = self.length * ((nslice - self.slice_index - 1) + 0.5)
@@ -371,107 +478,94 @@ class CrystalSlice(Element):
 
         return np.array((right_tuple,))
 
-    def _dual_pump(self, nslice, xv, yv):
-        left_tuple = self._left_pump(nslice, xv, yv)
-        right_tuple = self._right_pump(nslice, xv, yv)
+    def _dual_pump(self, nslice):
+        left_tuple = self._left_pump(nslice)
+        right_tuple = self._right_pump(nslice)
         return np.concatenate((left_tuple, right_tuple))
 
-    def _initialize_excited_states_mesh(self, params, nslice):
-        self.population_inversion = PKDict()
-        for k in params:
-            if "pop_inversion" in k:
-                self.population_inversion[k.replace("pop_inversion_", "")] = params[k]
-        x = np.linspace(
-            -self.population_inversion.mesh_extent * 1.15,
-            self.population_inversion.mesh_extent * 1.15,
-            self.population_inversion.n_cells,
+    def _pump_constants(self, nslice):
+        # slice independent factors of the excited state density [num_excited_states/m^3]
+
+        pump_wavelength = 532.0  # [nm]
+        seed_wavelength = 800.0  # [nm]
+        fraction_to_heating = (seed_wavelength - pump_wavelength) / seed_wavelength
+
+        energy_term = (
+            (self.population_inversion.pump_wavelength / (const.h * const.c))
+            * (1.0 - fraction_to_heating)
+            * self.population_inversion.pump_energy
+        )
+
+        return energy_term * self._pump_integral_factor / (self.length * nslice)
+
+    def _pump(self, param_set):
+        # axial (absorption) factor of one pump for this slice; the transverse profile is common
+        z, slice_front, slice_end = param_set
+        alpha = self.population_inversion.crystal_alpha
+
+        # (exp(-alpha*slice_front) - exp(-alpha*slice_end)) / (alpha*dz), using expm1 for precision
+        return (
+            -np.exp(-alpha * slice_front)
+            * np.expm1(-alpha * (slice_end - slice_front))
+            / (alpha * self.length)
+        )
+
+    def _initialize_excited_states_mesh(
+        self, params, nslice, population_inversion=None, transverse_pump_profile=None
+    ):
+        self.population_inversion = (
+            _population_inversion_params(params)
+            if population_inversion is None
+            else population_inversion
+        )
+        if transverse_pump_profile is None:
+            transverse_pump_profile = _pump_transverse_profile(
+                self.population_inversion
+            )
+        self._pump_integral_factor = _super_gaussian_integral_factor(
+            self.population_inversion.pump_gaussian_order,
+            self.population_inversion.pump_waist,
         )
-        xv, yv = np.meshgrid(x, x)
 
         param_set_array = PKDict(
             dual=self._dual_pump,
             left=self._left_pump,
             right=self._right_pump,
-        )[self.population_inversion.pump_type](nslice, xv, yv)
-
-        excited_states = np.zeros((len(x), len(x)))
-        for param_set in param_set_array:
-            z = param_set[0]
-            slice_front = param_set[1]
-            slice_end = param_set[2]
-
-            # integrate super-gaussian
-            g_order = self.population_inversion.pump_gaussian_order
-            integral_factor = (
-                g_order / (np.pi * self.population_inversion.pump_waist**2.0)
-            ) / (2.0 ** ((g_order - 2.0) / g_order) * gamma(2.0 / g_order))
-
-            pump_wavelength = 532.0  # [nm]
-            seed_wavelength = 800.0  # [nm]
-            fraction_to_heating = (seed_wavelength - pump_wavelength) / seed_wavelength
-
-            dz = self.length
-
-            energy_term = (
-                (self.population_inversion.pump_wavelength / (const.h * const.c))
-                * (1.0 - fraction_to_heating)
-                * self.population_inversion.pump_energy
-            )
-
-            alpha_term = (
-                np.exp(-self.population_inversion.crystal_alpha * slice_front)
-                - np.exp(-self.population_inversion.crystal_alpha * slice_end)
-            ) / (self.population_inversion.crystal_alpha * dz)
-
-            radial_term = np.exp(
-                -2.0
-                * (
-                    np.sqrt(
-                        (xv - self.population_inversion.pump_offset_x) ** 2.0
-                        + (yv - self.population_inversion.pump_offset_y) ** 2.0
-                    )
-                    / self.population_inversion.pump_waist
-                )
-                ** g_order
-            )
+        )[self.population_inversion.pump_type](nslice)
 
-            # Create mesh of [num_excited_states/m^3] pop_inversion_mesh
-            temp_mesh = (
-                energy_term * alpha_term * radial_term * integral_factor / (dz * nslice)
-            )
-
-            excited_states += temp_mesh.astype("float64")
+        # Sum the pumps' scalar factors, then scale the profile once to get the
+        # [num_excited_states/m^3] mesh
+        excited_states_factor = self._pump_constants(nslice) * sum(
+            self._pump(param_set) for param_set in param_set_array
+        )
 
         self.pop_inversion_mesh = (
-            2.0 * excited_states
-        )  # population inversion = N2 - N1 = 2* (number of excited states)
-
-    def _propagate_n0n2_lct(self, laser_pulse, calc_gain, nl_kick):
-        nslices_pulse = len(laser_pulse.slice)
-
-        dz = self.length
-        n0 = self.n0
-        n2 = self.n2
+            2.0 * excited_states_factor
+        ) * transverse_pump_profile  # population inversion = N2 - N1 = 2* (number of excited states)
+
+    def _n0n2_abcd(self, n2=None):
+        # ABCD matrix entries from n0, n2; only the slice's own n2 entries are cached
+        # (recomputed if n0, n2 or length changed), an override n2 never replaces them
+        if n2 is not None:
+            return _n0n2_abcd_entries(self.n0, n2, self.length)
+        k = (self.n0, self.n2, self.length)
+        if getattr(self, "_abcd_n0n2", None) is None or self._abcd_n0n2.key != k:
+            self._abcd_n0n2 = _n0n2_abcd_entries(*k)
+            self._abcd_n0n2.key = k
+        return self._abcd_n0n2
+
+    def _propagate_n0n2_lct(self, laser_pulse, calc_gain, nl_kick, override_n2=None):
         l_scale = (
             np.sqrt(np.pi) * laser_pulse.sigx_waist * np.sqrt(2.0)
         )  # sigx_waist = w0/np.sqrt(2.0)
 
-        ##Convert energy to wavelength
-        hc_ev_um = 1.23984198  # hc [eV*um]
-
-        # calculate components of ABCD matrix corrected with wavelength and scale factor for use in LCT algorithm
-        gamma = np.sqrt(n2 / n0)
-        A = np.cos(gamma * dz)
-        D = np.cos(gamma * dz)
-
-        for j in np.arange(laser_pulse.nslice):
-            thisSlice = laser_pulse.slice[j]
+        # components of ABCD matrix, corrected per photon energy with wavelength
+        # and scale factor for use in LCT algorithm
+        m = self._n0n2_abcd(override_n2)
+        A, B, C, D = m.A, m.B, m.C, m.D
 
-            # wavelength corresponding to photon_e_ev in meters
-            phLambda = hc_ev_um / thisSlice.photon_e_ev * 1e-6
-            B = (dz * np.sinc(gamma * dz / np.pi)) * (phLambda / l_scale**2)
-            C = (-n0 * gamma * np.sin(gamma * dz)) * (l_scale**2 / phLambda)
-            abcd_mat_cryst = np.array([[A, B], [C, D]])
+        def _propagate_slice(thisSlice):
+            abcd_mat_cryst = _lct_abcd_mat(A, B, C, D, thisSlice.photon_e_ev, l_scale)
 
             if calc_gain:
                 thisSlice = self.calc_gain(thisSlice)
@@ -482,45 +576,21 @@ class CrystalSlice(Element):
                 l_scale, abcd_mat_cryst, thisSlice.photon_e_ev, thisSlice.wfr
             )
 
-            for k in np.arange(thisSlice.bw_nslice):
-                thisSubSlice = thisSlice.bandwidth_slice[k]
-
-                # wavelength corresponding to photon_e_ev in meters
-                phLambda = hc_ev_um / thisSubSlice.photon_e_ev * 1e-6
-                B = (dz * np.sinc(gamma * dz / np.pi)) * (phLambda / l_scale**2)
-                C = (-n0 * gamma * np.sin(gamma * dz)) * (l_scale**2 / phLambda)
-                abcd_mat_cryst = np.array([[A, B], [C, D]])
-
-                if calc_gain:
-                    thisSubSlice = self.calc_gain(thisSubSlice)
-                if nl_kick:
-                    thisSubSlice = self.nl_kick(thisSubSlice)
-
-                thisSubSlice.wfr = _propagate_lct(
-                    l_scale, abcd_mat_cryst, thisSubSlice.photon_e_ev, thisSubSlice.wfr
-                )
+        # gain depletes the shared pop_inversion_mesh, so it needs the slices in order
+        _for_each_slice(laser_pulse, _propagate_slice, parallel=not calc_gain)
 
         laser_pulse.resize_laser_mesh()
         return laser_pulse
 
     def _propagate_abcd_lct(self, laser_pulse, calc_gain, nl_kick):
-        nslices_pulse = len(laser_pulse.slice)
-
         l_scale = (
             np.sqrt(np.pi) * laser_pulse.sigx_waist * np.sqrt(2.0)
         )  # sigx_waist = w0/np.sqrt(2.0)
 
-        ##Convert energy to wavelength
-        hc_ev_um = 1.23984198  # hc [eV*um]
-
-        for j in np.arange(laser_pulse.nslice):
-            thisSlice = laser_pulse.slice[j]
-
-            # wavelength corresponding to photon_e_ev in meters
-            phLambda = hc_ev_um / thisSlice.photon_e_ev * 1e-6
-            B = self.B * phLambda / (l_scale**2)
-            C = self.C / phLambda * (l_scale**2)
-            abcd_mat_cryst = np.array([[self.A, B], [C, self.D]])
+        def _propagate_slice(thisSlice):
+            abcd_mat_cryst = _lct_abcd_mat(
+                self.A, self.B, self.C, self.D, thisSlice.photon_e_ev, l_scale
+            )
 
             if calc_gain:
                 thisSlice = self.calc_gain(thisSlice)
@@ -531,31 +601,15 @@ class CrystalSlice(Element):
                 l_scale, abcd_mat_cryst, thisSlice.photon_e_ev, thisSlice.wfr
             )
 
-            for k in np.arange(thisSlice.bw_nslice):
-                thisSubSlice = thisSlice.bandwidth_slice[k]
-
-                # wavelength corresponding to photon_e_ev in meters
-                phLambda = hc_ev_um / thisSubSlice.photon_e_ev * 1e-6
-                B = self.B * phLambda / (l_scale**2)
-                C = self.C / phLambda * (l_scale**2)
-                abcd_mat_cryst = np.array([[self.A, B], [C, self.D]])
-
-                if calc_gain:
-                    thisSubSlice = self.calc_gain(thisSubSlice)
-                if nl_kick:
-                    thisSubSlice = self.nl_kick(thisSubSlice)
-
-                thisSubSlice.wfr = _propagate_lct(
-                    l_scale, abcd_mat_cryst, thisSubSlice.photon_e_ev, thisSubSlice.wfr
-                )
+        # gain depletes the shared pop_inversion_mesh, so it needs the slices in order
+        _for_each_slice(laser_pulse, _propagate_slice, parallel=not calc_gain)
 
         return laser_pulse
 
-    def _propagate_n0n2_srw(self, laser_pulse, calc_gain, nl_kick):
-        nslices = len(laser_pulse.slice)
+    def _propagate_n0n2_srw(self, laser_pulse, calc_gain, nl_kick, override_n2=None):
         L_slice = self.length
         n0 = self.n0
-        n2 = self.n2
+        n2 = self.n2 if override_n2 is None else override_n2
 
         if n2 == 0:
             optDrift = srwlib.SRWLOptD(L_slice / n0)
@@ -563,14 +617,10 @@ class CrystalSlice(Element):
             optBL = srwlib.SRWLOptC([optDrift], [propagParDrift])
 
         else:
-            gamma = np.sqrt(n2 / n0)
-            A = np.cos(gamma * L_slice)
-            B = L_slice * np.sinc(gamma * L_slice / np.pi)
-            C = -n0 * gamma * np.sin(gamma * L_slice)
-            D = np.cos(gamma * L_slice)
-            f1 = B / (1 - A)
-            L = B
-            f2 = B / (1 - D)
+            m = self._n0n2_abcd(n2)
+            f1 = m.B / (1 - m.A)
+            L = m.B
+            f2 = m.B / (1 - m.D)
 
             optLens1 = srwlib.SRWLOptL(f1, f1)
             optDrift = srwlib.SRWLOptD(L)
@@ -585,9 +635,7 @@ class CrystalSlice(Element):
                 [propagParLens1, propagParDrift, propagParLens2],
             )
 
-        for j in np.arange(laser_pulse.nslice):
-            thisSlice = laser_pulse.slice[j]
-
+        def _propagate_slice(thisSlice):
             if calc_gain:
                 thisSlice = self.calc_gain(thisSlice)
             if nl_kick:
@@ -595,97 +643,86 @@ class CrystalSlice(Element):
 
             srwlib.srwl.PropagElecField(thisSlice.wfr, optBL)
 
-            for k in np.arange(thisSlice.bw_nslice):
-                thisSubSlice = thisSlice.bandwidth_slice[k]
-
-                if calc_gain:
-                    thisSubSlice = self.calc_gain(thisSubSlice)
-                if nl_kick:
-                    thisSubSlice = self.nl_kick(thisSubSlice)
-
-                srwlib.srwl.PropagElecField(thisSubSlice.wfr, optBL)
+        # optBL depends only on this crystal slice, so it is shared by every pulse slice
+        _for_each_slice(laser_pulse, _propagate_slice, parallel=False)
 
         return laser_pulse
 
     def _propagate_gain_calc(self, laser_pulse, calc_gain, nl_kick):
         # calculates gain regardles of calc_gain param value
-        for j in np.arange(laser_pulse.nslice):
-            thisSlice = laser_pulse.slice[j]
-            thisSlice = self.calc_gain(thisSlice)
-            for k in np.arange(thisSlice.bw_nslice):
-                thisSubSlice = thisSlice.bandwidth_slice[k]
-                thisSubSlice = self.calc_gain(thisSubSlice)
+        _for_each_slice(laser_pulse, self.calc_gain, parallel=False)
         return laser_pulse
 
     def _propagate_nl_kick(self, laser_pulse, nl_kick):
         # applies NL kick regardless of nl_kick param value
-        for j in np.arange(laser_pulse.nslice):
-            thisSlice = laser_pulse.slice[j]
-            thisSlice = self.nl_kick(thisSlice)
-            for k in np.arange(thisSlice.bw_nslice):
-                thisSubSlice = thisSlice.bandwidth_slice[k]
-                thisSubSlice = self.nl_kick(thisSubSlice)
+        _for_each_slice(laser_pulse, self.nl_kick, parallel=True)
         return laser_pulse
 
-    def propagate(self, laser_pulse, prop_type, calc_gain=False, nl_kick=False):
+    def propagate(
+        self, laser_pulse, prop_type, calc_gain=False, nl_kick=False, override_n2=None
+    ):
         if prop_type == "default":
             super().propagate(laser_pulse)
             return
-        r = PKDict(
+        p = PKDict(
             abcd_lct=self._propagate_abcd_lct,
             n0n2_lct=self._propagate_n0n2_lct,
             n0n2_srw=self._propagate_n0n2_srw,
             gain_calc=self._propagate_gain_calc,
-        )[prop_type](laser_pulse, calc_gain, nl_kick)
-        return r
+        )[prop_type]
+        if override_n2 is None:
+            return p(laser_pulse, calc_gain, nl_kick)
+        if prop_type not in ("n0n2_lct", "n0n2_srw"):
+            raise ElementException(
+                f'override_n2 is not supported for prop_type "{prop_type}"'
+            )
+        return p(laser_pulse, calc_gain, nl_kick, override_n2=override_n2)
 
     def _interpolate_a_to_b(self, a, b):
+        # uniform meshes are passed around as (start, stop, num)
+        pop_inversion_x = (
+            -self.population_inversion.mesh_extent * 1.15,
+            self.population_inversion.mesh_extent * 1.15,
+            self.population_inversion.n_cells,
+        )
         if a == "pop_inversion":
             # interpolate copy of pop_inversion to match lp_wfr
-            temp_array = np.copy(self.pop_inversion_mesh)
+            temp_array = self.pop_inversion_mesh
 
-            a_x = np.linspace(
-                -self.population_inversion.mesh_extent * 1.15,
-                self.population_inversion.mesh_extent * 1.15,
-                self.population_inversion.n_cells,
-            )
+            a_x = pop_inversion_x
             a_y = a_x
-            b_x = np.linspace(b.mesh.xStart, b.mesh.xFin, b.mesh.nx)
-            b_y = np.linspace(b.mesh.yStart, b.mesh.yFin, b.mesh.ny)
+            b_x = (b.mesh.xStart, b.mesh.xFin, b.mesh.nx)
+            b_y = (b.mesh.yStart, b.mesh.yFin, b.mesh.ny)
 
         elif b == "pop_inversion":
             # interpolate copy of change_pop_inversion to match pop_inversion
-            temp_array = np.copy(a.mesh)
-
-            a_x = a.x
-            a_y = a.y
-            b_x = np.linspace(
-                -self.population_inversion.mesh_extent * 1.15,
-                self.population_inversion.mesh_extent * 1.15,
-                self.population_inversion.n_cells,
-            )
-            b_y = b_x
+            temp_array = a.mesh
 
-        if not (np.array_equal(a_x, b_x) and np.array_equal(a_y, b_y)):
+            a_x = (a.x[0], a.x[-1], len(a.x))
+            a_y = (a.y[0], a.y[-1], len(a.y))
+            b_x = pop_inversion_x
+            b_y = b_x
 
-            # Create the spline for interpolation
-            rect_biv_spline = RectBivariateSpline(a_x, a_y, temp_array)
+        # Set any interpolated values outside the bounds of the original mesh to zero
+        dx = (
+            2.0
+            * self.population_inversion.mesh_extent
+            * 1.15
+            / self.population_inversion.n_cells
+        )
+        r_cutoff = self.population_inversion.mesh_extent * 1.15 - 0.9 * dx
 
-            # Evaluate the spline at b gridpoints
-            temp_array = rect_biv_spline(b_x, b_y)
+        m = _regrid_map(a_x, a_y, b_x, b_y, r_cutoff)
+        if m is None:
+            return np.copy(temp_array)
 
-            # Set any interpolated values outside the bounds of the original mesh to zero
-            dx = (
-                2.0
-                * self.population_inversion.mesh_extent
-                * 1.15
-                / self.population_inversion.n_cells
-            )
-            b_xv, b_yv = np.meshgrid(b_x, b_y)
-            b_r = np.sqrt(b_xv**2.0 + b_yv**2.0)
-            temp_array[
-                b_r > self.population_inversion.mesh_extent * 1.15 - 0.9 * dx
-            ] = 0.0
+        # Evaluate the cubic spline of a at the b gridpoints
+        temp_array = m.weights_x @ temp_array @ m.weights_y.T
+        temp_array[: m.x_lo] = 0.0
+        temp_array[m.x_hi :] = 0.0
+        temp_array[:, : m.y_lo] = 0.0
+        temp_array[:, m.y_hi :] = 0.0
+        temp_array[m.x_lo : m.x_hi, m.y_lo : m.y_hi][m.outside] = 0.0
 
         return temp_array
 
@@ -724,65 +761,33 @@ class CrystalSlice(Element):
         # match the laser_pulse wavefront mesh
         temp_pop_inversion = self._interpolate_a_to_b("pop_inversion", lp_wfr)
 
-        # Calculate gain
-        cross_sec = splev(thisSlice._lambda, self.cross_section_fn)  # [m^2]
+        # Calculate gain; every slice of a pulse typically has the same wavelength
+        wavelength = float(thisSlice._lambda)
+        cross_sec = self._cross_sections.get(wavelength)  # [m^2]
+        if cross_sec is None:
+            cross_sec = self._cross_sections[wavelength] = float(
+                _CRYSTAL_CROSS_SECTION_FN(wavelength)
+                if self.cross_section_fn is _CRYSTAL_CROSS_SECTION_TCK
+                else splev(wavelength, self.cross_section_fn)
+            )
         degen_factor = 1.67
 
         dx = (lp_wfr.mesh.xFin - lp_wfr.mesh.xStart) / lp_wfr.mesh.nx  # [m]
         dy = (lp_wfr.mesh.yFin - lp_wfr.mesh.yStart) / lp_wfr.mesh.ny  # [m]
         n_incident_photons = thisSlice.n_photons_2d.mesh / (dx * dy)  # [1/m^2]
 
-        epsilon = (
-            degen_factor * np.float128(cross_sec) * np.float128(n_incident_photons)
-        )
-        beta = np.float128(cross_sec) * np.float128(temp_pop_inversion) * self.length
-        nx, ny = np.shape(n_incident_photons)
-
-        condition_1 = np.where(epsilon < 1.0e-5)
-        condition_2 = np.where(epsilon >= 1.0e-5)
-
-        energy_gain = np.ones(np.shape(epsilon))
-        energy_gain[condition_1] = (
-            np.exp(beta[condition_1])
-            - (
-                0.5
-                * epsilon[condition_1]
-                * np.exp(beta[condition_1])
-                * (np.exp(beta[condition_1]) - 1.0)
-            )
-            + (
-                (1.0 / 6.0)
-                * epsilon[condition_1] ** 2.0
-                * np.exp(beta[condition_1])
-                * (
-                    1.0
-                    - 3.0 * np.exp(beta[condition_1])
-                    + 2.0 * np.exp(2.0 * beta[condition_1])
-                )
-            )
-            + (
-                (1.0 / 24.0)
-                * epsilon[condition_1] ** 3.0
-                * np.exp(beta[condition_1])
-                * (
-                    1.0
-                    - 7.0 * np.exp(beta[condition_1])
-                    + 12.0 * np.exp(2.0 * beta[condition_1])
-                    - 6.0 * np.exp(3.0 * beta[condition_1])
-                )
-            )
-        )  # + ...
-        energy_gain[condition_2] = (1.0 / epsilon[condition_2]) * np.log(
-            1.0 + np.exp(beta[condition_2]) * (np.exp(epsilon[condition_2]) - 1.0)
-        )
+        # the scalar factors are folded first so each mesh product is a single pass
+        epsilon = (degen_factor * cross_sec) * n_incident_photons
+        beta = (cross_sec * self.length) * temp_pop_inversion
+        energy_gain = _energy_gain(epsilon, beta)
 
         # Have some gain values that are 0.999... and these introduce negatives later on
-        energy_gain[energy_gain < 1.0] = 1.0
+        np.maximum(energy_gain, 1.0, out=energy_gain)
 
         # Calculate change factor for pop_inversion, note it has the same dimensions as lp_wfr
-        change_pop_mesh = -(
-            degen_factor * n_incident_photons * (energy_gain - 1.0) / self.length
-        )
+        change_pop_mesh = np.subtract(1.0, energy_gain, out=beta)
+        change_pop_mesh *= n_incident_photons
+        change_pop_mesh *= degen_factor / self.length
 
         change_pop_inversion = PKDict(
             mesh=change_pop_mesh,
@@ -823,30 +828,14 @@ class CrystalSlice(Element):
         gain_im0_ey = np.zeros(np.shape(gain_im0_ex))
         
         """
-        re0_2d_ex, im0_2d_ex, re0_2d_ey, im0_2d_ey = srwutil.extract_2d_fields(
-            thisSlice.wfr
-        )
-
-        gain_re0_ex = re0_2d_ex * np.sqrt(energy_gain)
-        gain_im0_ex = im0_2d_ex * np.sqrt(energy_gain)
-        gain_re0_ey = re0_2d_ey * np.sqrt(energy_gain)
-        gain_im0_ey = im0_2d_ey * np.sqrt(energy_gain)
+        # scale the (re, im) pairs of both polarizations in place in the interleaved
+        # SRW buffers: the mesh is unchanged, so the wavefront itself is kept;
+        # sqrt(energy_gain) is taken once, in float32 so the fields are not upcast
+        field_gain = np.sqrt(energy_gain, dtype=np.float32).reshape((-1, 1))
+        srwutil.field_pairs(lp_wfr.arEx)[...] *= field_gain
+        srwutil.field_pairs(lp_wfr.arEy)[...] *= field_gain
         # """
 
-        x = np.linspace(lp_wfr.mesh.xStart, lp_wfr.mesh.xFin, lp_wfr.mesh.nx)
-        y = np.linspace(lp_wfr.mesh.yStart, lp_wfr.mesh.yFin, lp_wfr.mesh.ny)
-
-        # remake the wavefront
-        thisSlice.wfr = srwutil.make_wavefront(
-            gain_re0_ex,
-            gain_im0_ex,
-            gain_re0_ey,
-            gain_im0_ey,
-            thisSlice.photon_e_ev,
-            x,
-            y,
-        )
-
         return thisSlice
 
     def nl_kick(self, thisSlice):
@@ -872,27 +861,18 @@ class CrystalSlice(Element):
         # create nonlinear kick array
         nl_kick_array = np.exp(np.multiply(np.multiply(delta_n_interp, 1j), l_over_lam))
 
-        re0_2d_ex, im0_2d_ex, re0_2d_ey, im0_2d_ey = srwutil.extract_2d_fields(lp_wfr)
-
-        Etot0_2d_x = re0_2d_ex + 1j * im0_2d_ex
-        Etot0_2d_y = re0_2d_ey + 1j * im0_2d_ey
+        shape = (lp_wfr.mesh.nx, lp_wfr.mesh.ny)
+        Etot0_2d_x = srwutil.complex_view(lp_wfr.arEx).reshape(shape)
+        Etot0_2d_y = srwutil.complex_view(lp_wfr.arEy).reshape(shape)
 
         # multiply horizontal and vertical total E fields by nl kick array
         Etot0_2d_x_nl_kick = np.multiply(Etot0_2d_x, nl_kick_array)
         Etot0_2d_y_nl_kick = np.multiply(Etot0_2d_y, nl_kick_array)
 
-        # return to SRW wavefront form
-        ex_real = np.real(Etot0_2d_x_nl_kick).flatten(order="C")
-        ex_imag = np.imag(Etot0_2d_x_nl_kick).flatten(order="C")
-        ey_real = np.real(Etot0_2d_y_nl_kick).flatten(order="C")
-        ey_imag = np.imag(Etot0_2d_y_nl_kick).flatten(order="C")
-
         # remake the wavefront
-        thisSlice.wfr = srwutil.make_wavefront(
-            ex_real,
-            ex_imag,
-            ey_real,
-            ey_imag,
+        thisSlice.wfr = srwutil.make_wavefront_from_complex(
+            Etot0_2d_x_nl_kick,
+            Etot0_2d_y_nl_kick,
             thisSlice.photon_e_ev,
             np.linspace(lp_wfr.mesh.xStart, lp_wfr.mesh.xFin, lp_wfr.mesh.nx),
             np.linspace(lp_wfr.mesh.yStart, lp_wfr.mesh.yFin, lp_wfr.mesh.ny),
@@ -901,53 +881,185 @@ class CrystalSlice(Element):
         return thisSlice
 
 
+def _n0n2_abcd_entries(n0, n2, length):
+    gamma = np.sqrt(n2 / n0)
+    return PKDict(
+        A=np.cos(gamma * length),
+        B=length * np.sinc(gamma * length / np.pi),
+        C=-n0 * gamma * np.sin(gamma * length),
+        D=np.cos(gamma * length),
+    )
+
+
+def _energy_gain(epsilon, beta):
+    # pixelwise (1/epsilon) * ln(1 + e^beta * (e^epsilon - 1)), in float64 since
+    # float128 has no vector math; the epsilon -> 0 limit is e^beta
+    gain = np.empty(np.shape(epsilon))
+    lit = epsilon > 0.0
+    # photon-free pixels gain no photons, so their e^beta limit is capped to stay
+    # within what the float32 field arrays can hold
+    gain[~lit] = np.exp(np.minimum(beta[~lit], _LOG_FLOAT32_MAX))
+    e = epsilon[lit]
+    b = beta[lit]
+    g = np.empty(np.shape(e))
+    # while e^(beta + epsilon) fits in a float64, log1p/expm1 keep small epsilon
+    # accurate without a series expansion
+    d = e + np.maximum(b, 0.0) < _GAIN_DIRECT_MAX
+    g[d] = np.log1p(np.expm1(e[d]) * np.exp(b[d])) / e[d]
+    # past that the log argument overflows, so its log is formed directly:
+    # ln(e^beta * (e^epsilon - 1)) = beta + epsilon + ln(1 - e^-epsilon)
+    d = ~d
+    e = e[d]
+    g[d] = np.logaddexp(0.0, b[d] + e + np.log(-np.expm1(-e))) / e
+    gain[lit] = g
+    return gain
+
+
+def _population_inversion_params(params):
+    # pop_inversion_* params with the prefix stripped
+    return PKDict(
+        {
+            k.replace("pop_inversion_", ""): params[k]
+            for k in params
+            if "pop_inversion" in k
+        }
+    )
+
+
+def _super_gaussian_integral_factor(g_order, pump_waist):
+    # 1 / integral of exp(-2 (r/w)**g) over the transverse plane
+    return (g_order / (np.pi * pump_waist**2.0)) / (
+        2.0 ** ((g_order - 2.0) / g_order) * gamma(2.0 / g_order)
+    )
+
+
+def _pump_transverse_profile(population_inversion):
+    # super-gaussian pump profile on the pop_inversion mesh, shared read-only by crystal slices
+    x = np.linspace(
+        -population_inversion.mesh_extent * 1.15,
+        population_inversion.mesh_extent * 1.15,
+        population_inversion.n_cells,
+    )
+
+    # r2 is separable: square the 1d offsets, then a single broadcast add onto the 2d mesh
+    dx2 = (
+        (x - population_inversion.pump_offset_x) / population_inversion.pump_waist
+    ) ** 2
+    dy2 = (
+        (x - population_inversion.pump_offset_y) / population_inversion.pump_waist
+    ) ** 2
+    profile = np.add.outer(dy2, dx2)
+
+    # exp(-2 (r/w)**g_order) evaluated in place; the gaussian (g_order = 2) needs no power
+    if population_inversion.pump_gaussian_order != 2.0:
+        np.power(profile, population_inversion.pump_gaussian_order / 2.0, out=profile)
+    profile *= -2.0
+    np.exp(profile, out=profile)
+    profile.setflags(write=False)
+    return profile
+
+
+@functools.lru_cache(maxsize=8)
+def _regrid_map(a_x, a_y, b_x, b_y, r_cutoff):
+    # spline weights of the a gridpoints at the b gridpoints, and the b points beyond
+    # r_cutoff; depends only on the meshes, so it is shared by every slice & gain
+    # step (None when the meshes coincide)
+    if a_x == b_x and a_y == b_y:
+        return None
+    b_x = np.linspace(*b_x)
+    b_y = np.linspace(*b_y)
+    # b_x, b_y are sorted, so the rows & cols entirely beyond r_cutoff are a
+    # contiguous prefix & suffix; only the block in between needs a radial mask
+    x_lo = np.searchsorted(b_x, -r_cutoff, side="left")
+    x_hi = np.searchsorted(b_x, r_cutoff, side="right")
+    y_lo = np.searchsorted(b_y, -r_cutoff, side="left")
+    y_hi = np.searchsorted(b_y, r_cutoff, side="right")
+    b_xv, b_yv = np.meshgrid(b_x[x_lo:x_hi], b_y[y_lo:y_hi], indexing="ij")
+    m = PKDict(
+        weights_x=_spline_weights(np.linspace(*a_x), b_x),
+        weights_y=_spline_weights(np.linspace(*a_y), b_y),
+        x_lo=x_lo,
+        x_hi=x_hi,
+        y_lo=y_lo,
+        y_hi=y_hi,
+        outside=np.sqrt(b_xv**2.0 + b_yv**2.0) > r_cutoff,
+    )
+    m.weights_x.setflags(write=False)
+    m.weights_y.setflags(write=False)
+    m.outside.setflags(write=False)
+    return m
+
+
+def _spline_weights(a, b):
+    # values at b of the cubic not-a-knot splines through each unit vector on a,
+    # clamped to a's ends: the same interpolant as RectBivariateSpline, whose 2d
+    # spline on a grid is the product of these along x & y
+    return make_interp_spline(a, np.eye(len(a)), k=3, bc_type="not-a-knot")(
+        np.clip(b, a[0], a[-1])
+    )
+
+
 def _interp_to_odd(x_old, y_old, mesh_old):
 
     nx, ny = len(x_old), len(y_old)
     if nx % 2 == 0:
-        x_new = np.linspace(np.min(x_old), np.max(x_old), nx + 1)
+        x_new = np.linspace(x_old[0], x_old[-1], nx + 1)
     else:
-        x_new = np.copy(x_old)
+        x_new = x_old
     if ny % 2 == 0:
-        y_new = np.linspace(np.min(y_old), np.max(y_old), ny + 1)
+        y_new = np.linspace(y_old[0], y_old[-1], ny + 1)
     else:
-        y_new = np.copy(y_old)
+        y_new = y_old
 
     if nx % 2 == 0 or ny % 2 == 0:
         mesh_new = {}
         for mesh in mesh_old:
             pre_interp = mesh_old["{}".format(mesh)]
-            rect_biv_spline = RectBivariateSpline(x_old, y_old, pre_interp)
-            post_interp = rect_biv_spline(x_new, y_new)
+            post_interp = RectBivariateSpline(x_old, y_old, np.real(pre_interp))(
+                x_new, y_new
+            )
+            if np.iscomplexobj(pre_interp):
+                # complex fields are interpolated through their real & imaginary parts
+                post_interp = srwutil.complex_field(
+                    post_interp,
+                    RectBivariateSpline(x_old, y_old, np.imag(pre_interp))(
+                        x_new, y_new
+                    ),
+                )
             mesh_new["{}".format(mesh)] = post_interp
     else:
-        mesh_new = copy.deepcopy(mesh_old)
+        # callers build x_old, y_old & mesh_old fresh for each call, so no copy is needed
+        mesh_new = mesh_old
 
     return x_new, y_new, mesh_new
 
 
 def _propagate_lct(l_scale, abcd_mat_cryst, photon_e_ev, wfr0):
-    re0_2d_ex, im0_2d_ex, re0_2d_ey, im0_2d_ey = srwutil.extract_2d_fields(wfr0)
-
     xvals_slice = np.linspace(wfr0.mesh.xStart, wfr0.mesh.xFin, wfr0.mesh.nx)
     yvals_slice = np.linspace(wfr0.mesh.yStart, wfr0.mesh.yFin, wfr0.mesh.ny)
 
+    # the SRW complex64 fields, widened once to complex128 for the LCT
+    shape = (wfr0.mesh.nx, wfr0.mesh.ny)
     mesh_old = {
-        "re0_2d_ex": re0_2d_ex,
-        "im0_2d_ex": im0_2d_ex,
-        "re0_2d_ey": re0_2d_ey,
-        "im0_2d_ey": im0_2d_ey,
+        "Etot0_2d_x": srwutil.complex_view(wfr0.arEx)
+        .astype(np.complex128)
+        .reshape(shape),
+        "Etot0_2d_y": srwutil.complex_view(wfr0.arEy)
+        .astype(np.complex128)
+        .reshape(shape),
     }
     xvals_slice, yvals_slice, mesh_new = _interp_to_odd(
         xvals_slice, yvals_slice, mesh_old
     )
 
-    Etot0_2d_x = mesh_new["re0_2d_ex"] + 1j * mesh_new["im0_2d_ex"]
-    Etot0_2d_y = mesh_new["re0_2d_ey"] + 1j * mesh_new["im0_2d_ey"]
+    Etot0_2d_x = mesh_new["Etot0_2d_x"]
+    Etot0_2d_y = mesh_new["Etot0_2d_y"]
 
-    dX = xvals_slice[1] - xvals_slice[0]  # horizontal spacing [m]
+    # horizontal spacing [m]
+    dX = (xvals_slice[-1] - xvals_slice[0]) / (len(xvals_slice) - 1)
     dX_scale = dX / l_scale
-    dY = yvals_slice[1] - yvals_slice[0]  # vertical spacing [m]
+    # vertical spacing [m]
+    dY = (yvals_slice[-1] - yvals_slice[0]) / (len(yvals_slice) - 1)
     dY_scale = dY / l_scale
 
     # define horizontal and vertical input signals
@@ -955,59 +1067,44 @@ def _propagate_lct(l_scale, abcd_mat_cryst, photon_e_ev, wfr0):
     in_signal_2d_y = (dX_scale, dY_scale, Etot0_2d_y)
 
     # calculate 2D LCTs
-    dX_out, dY_out, out_signal_2d_x = rslct.apply_lct_2d_sep(
-        abcd_mat_cryst, abcd_mat_cryst, in_signal_2d_x
-    )
-    dX_out, dY_out, out_signal_2d_y = rslct.apply_lct_2d_sep(
-        abcd_mat_cryst, abcd_mat_cryst, in_signal_2d_y
-    )
-
-    re_out_signal_2d_x = np.real(out_signal_2d_x)
-    x_total = (np.shape(re_out_signal_2d_x)[0] - 1) * dX_out
-    y_total = (np.shape(re_out_signal_2d_x)[1] - 1) * dY_out
+    lct_x, lct_y = _apply_lct_2d_xy(abcd_mat_cryst, in_signal_2d_x, in_signal_2d_y)
+    dX_out, dY_out, out_signal_2d_x = lct_x
+    dX_out, dY_out, out_signal_2d_y = lct_y
 
-    xold = np.linspace(-x_total / 2.0, x_total / 2.0, np.shape(re_out_signal_2d_x)[0])
-    yold = np.linspace(-y_total / 2.0, y_total / 2.0, np.shape(re_out_signal_2d_x)[1])
+    nx_out, ny_out = np.shape(out_signal_2d_x)
+    x_total = (nx_out - 1) * dX_out
+    y_total = (ny_out - 1) * dY_out
+    xold = np.linspace(-x_total / 2.0, x_total / 2.0, nx_out)
+    yold = np.linspace(-y_total / 2.0, y_total / 2.0, ny_out)
 
     mesh_old_2 = {
-        "re_out_signal_2d_x": np.real(out_signal_2d_x),
-        "im_out_signal_2d_x": np.imag(out_signal_2d_x),
-        "re_out_signal_2d_y": np.real(out_signal_2d_y),
-        "im_out_signal_2d_y": np.imag(out_signal_2d_y),
+        "out_signal_2d_x": out_signal_2d_x,
+        "out_signal_2d_y": out_signal_2d_y,
     }
     xnew, ynew, mesh_new = _interp_to_odd(xold, yold, mesh_old_2)
 
-    if (
-        np.shape(re_out_signal_2d_x)[0] % 2 == 0
-        or np.shape(re_out_signal_2d_x)[1] % 2 == 0
-    ):
-        dX_out = np.mean(np.diff(xnew))
-        dY_out = np.mean(np.diff(ynew))
+    if nx_out % 2 == 0 or ny_out % 2 == 0:
+        dX_out = (xnew[-1] - xnew[0]) / (len(xnew) - 1)
+        dY_out = (ynew[-1] - ynew[0]) / (len(ynew) - 1)
 
-    out_signal_2d_x = (
-        mesh_new["re_out_signal_2d_x"] + 1j * mesh_new["im_out_signal_2d_x"]
-    )
-    out_signal_2d_y = (
-        mesh_new["re_out_signal_2d_y"] + 1j * mesh_new["im_out_signal_2d_y"]
-    )
+    out_signal_2d_x = mesh_new["out_signal_2d_x"]
+    out_signal_2d_y = mesh_new["out_signal_2d_y"]
 
     # extract propagated complex field and calculate corresponding x and y mesh arrays
     # we assume same mesh for both components of E_field
     hx = dX_out * l_scale
     hy = dY_out * l_scale
-    ny, nx = np.shape(out_signal_2d_x)
+    nx, ny = np.shape(out_signal_2d_x)
     local_xv = rslct.lct_abscissae(nx, hx)
     local_yv = rslct.lct_abscissae(ny, hy)
 
     # remake the wavefront
-    wfr = srwutil.make_wavefront(
-        np.real(out_signal_2d_x),
-        np.imag(out_signal_2d_x),
-        np.real(out_signal_2d_y),
-        np.imag(out_signal_2d_y),
+    wfr = srwutil.make_wavefront_from_complex(
+        out_signal_2d_x,
+        out_signal_2d_y,
         photon_e_ev,
-        np.linspace(np.min(local_xv), np.max(local_xv), nx),
-        np.linspace(np.min(local_xv), np.max(local_xv), ny),
+        local_xv,
+        local_yv,
     )
 
     return wfr
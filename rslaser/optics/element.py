@@ -1,6 +1,7 @@
 from rslaser.utils.validator import ValidatorBase
-import copy
+import concurrent.futures
 import numpy as np
+import threading
 from pykern.pkcollections import PKDict
 from rsmath import lct as rslct
 import srwlib
@@ -9,6 +10,45 @@ import scipy.constants as const
 import rslaser.utils.srwl_uti_data as srwutil
 from scipy.interpolate import RectBivariateSpline
 
+# pulse slices own their wavefronts, so once set_max_threads enables it, slice
+# propagations that touch no shared state (LCTs & nl kicks; not gain, not SRW), or
+# else the two polarizations of a slice, are run side by side on one pool, created
+# on first use. Off by default: callers may already parallelize (MPI, sirepo jobs)
+_POOL = PKDict(max_threads=1, executor=None)
+_POOL_THREAD = threading.local()
+
+
+def set_max_threads(max_threads):
+    """Set the number of threads used to propagate pulse slices side by side
+
+    Threads assume rsmath's lct.apply_lct_2d_sep is thread-safe, which is not
+    checked here; enable them only where that holds.
+
+    Args:
+        max_threads (int): worker threads, e.g. os.cpu_count(); 1 (the default)
+            propagates the slices and their polarizations in order, without threads
+    """
+    if max_threads < 1:
+        raise ElementException(f"max_threads={max_threads} must be at least 1")
+    if _POOL.executor is not None:
+        _POOL.executor.shutdown(wait=True)
+    _POOL.max_threads = max_threads
+    _POOL.executor = None
+
+
+def _executor():
+    # None when threads are off, or when already on a pool thread: pool threads
+    # never wait on the pool, so it cannot deadlock or exceed max_threads
+    if _POOL.max_threads <= 1 or getattr(_POOL_THREAD, "active", False):
+        return None
+    if _POOL.executor is None:
+        _POOL.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=_POOL.max_threads,
+            initializer=setattr,
+            initargs=(_POOL_THREAD, "active", True),
+        )
+    return _POOL.executor
+
 
 class ElementException(Exception):
     pass
@@ -36,56 +76,111 @@ class Element(ValidatorBase):
         return laser_pulse
 
 
+def _pulse_slices(laser_pulse):
+    # every slice of laser_pulse followed by its bandwidth sub-slices
+    for thisSlice in laser_pulse.slice:
+        yield thisSlice
+        yield from thisSlice.bandwidth_slice
+
+
+def _for_each_slice(laser_pulse, op, parallel):
+    # apply op to every (sub-)slice of laser_pulse, in order unless parallel
+    e = _executor() if parallel else None
+    if e is None:
+        for s in _pulse_slices(laser_pulse):
+            op(s)
+        return
+    for f in [e.submit(op, s) for s in _pulse_slices(laser_pulse)]:
+        f.result()
+
+
 def _interp_to_odd(x_old, y_old, mesh_old):
 
     nx, ny = len(x_old), len(y_old)
     if nx % 2 == 0:
-        x_new = np.linspace(np.min(x_old), np.max(x_old), nx + 1)
+        x_new = np.linspace(x_old[0], x_old[-1], nx + 1)
     else:
-        x_new = np.copy(x_old)
+        x_new = x_old
     if ny % 2 == 0:
-        y_new = np.linspace(np.min(y_old), np.max(y_old), ny + 1)
+        y_new = np.linspace(y_old[0], y_old[-1], ny + 1)
     else:
-        y_new = np.copy(y_old)
+        y_new = y_old
 
     if nx % 2 == 0 or ny % 2 == 0:
         mesh_new = {}
         for mesh in mesh_old:
             pre_interp = mesh_old["{}".format(mesh)]
-            rect_biv_spline = RectBivariateSpline(x_old, y_old, pre_interp)
-            post_interp = rect_biv_spline(x_new, y_new)
+            post_interp = RectBivariateSpline(x_old, y_old, np.real(pre_interp))(
+                x_new, y_new
+            )
+            if np.iscomplexobj(pre_interp):
+                # complex fields are interpolated through their real & imaginary parts
+                post_interp = srwutil.complex_field(
+                    post_interp,
+                    RectBivariateSpline(x_old, y_old, np.imag(pre_interp))(
+                        x_new, y_new
+                    ),
+                )
             mesh_new["{}".format(mesh)] = post_interp
     else:
-        mesh_new = copy.deepcopy(mesh_old)
+        # callers build x_old, y_old & mesh_old fresh for each call, so no copy is needed
+        mesh_new = mesh_old
 
     return x_new, y_new, mesh_new
 
 
-def _prop_abcd_lct(laser_pulse, abcd_mat, l_scale):
-    nslices_pulse = laser_pulse.nslice
+def _lct_abcd_mat(A, B, C, D, photon_e_ev, l_scale):
+    # ABCD matrix corrected with wavelength and scale factor for use in LCT algorithm
+    hc_ev_um = 1.23984198  # hc [eV*um]
+    phLambda = hc_ev_um / photon_e_ev * 1e-6
+    abcd_mat_lct = np.array(
+        [
+            [A, B * phLambda / (l_scale**2)],
+            [C / phLambda * (l_scale**2), D],
+        ]
+    )
+    return abcd_mat_lct
+
+
+def _apply_lct_2d_xy(abcd_mat, in_signal_2d_x, in_signal_2d_y):
+    # apply the same separable 2D LCT to the horizontal and vertical input signals
+    e = _executor()
+    if e is None:
+        return (
+            rslct.apply_lct_2d_sep(abcd_mat, abcd_mat, in_signal_2d_x),
+            rslct.apply_lct_2d_sep(abcd_mat, abcd_mat, in_signal_2d_y),
+        )
+    f = e.submit(rslct.apply_lct_2d_sep, abcd_mat, abcd_mat, in_signal_2d_y)
+    return rslct.apply_lct_2d_sep(abcd_mat, abcd_mat, in_signal_2d_x), f.result()
 
-    def _wfr_prop_abcd_lct(abcd_mat_cryst, l_scale, photon_e_ev, wfr0):
-        re0_2d_ex, im0_2d_ex, re0_2d_ey, im0_2d_ey = srwutil.extract_2d_fields(wfr0)
 
+def _prop_abcd_lct(laser_pulse, abcd_mat, l_scale):
+    def _wfr_prop_abcd_lct(abcd_mat_cryst, l_scale, photon_e_ev, wfr0):
         xvals_slice = np.linspace(wfr0.mesh.xStart, wfr0.mesh.xFin, wfr0.mesh.nx)
         yvals_slice = np.linspace(wfr0.mesh.yStart, wfr0.mesh.yFin, wfr0.mesh.ny)
 
+        # the SRW complex64 fields, widened once to complex128 for the LCT
+        shape = (wfr0.mesh.nx, wfr0.mesh.ny)
         mesh_old = {
-            "re0_2d_ex": re0_2d_ex,
-            "im0_2d_ex": im0_2d_ex,
-            "re0_2d_ey": re0_2d_ey,
-            "im0_2d_ey": im0_2d_ey,
+            "Etot0_2d_x": srwutil.complex_view(wfr0.arEx)
+            .astype(np.complex128)
+            .reshape(shape),
+            "Etot0_2d_y": srwutil.complex_view(wfr0.arEy)
+            .astype(np.complex128)
+            .reshape(shape),
         }
         xvals_slice, yvals_slice, mesh_new = _interp_to_odd(
             xvals_slice, yvals_slice, mesh_old
         )
 
-        Etot0_2d_x = mesh_new["re0_2d_ex"] + 1j * mesh_new["im0_2d_ex"]
-        Etot0_2d_y = mesh_new["re0_2d_ey"] + 1j * mesh_new["im0_2d_ey"]
+        Etot0_2d_x = mesh_new["Etot0_2d_x"]
+        Etot0_2d_y = mesh_new["Etot0_2d_y"]
 
-        dX = xvals_slice[1] - xvals_slice[0]  # horizontal spacing [m]
+        # horizontal spacing [m]
+        dX = (xvals_slice[-1] - xvals_slice[0]) / (len(xvals_slice) - 1)
         dX_scale = dX / l_scale
-        dY = yvals_slice[1] - yvals_slice[0]  # vertical spacing [m]
+        # vertical spacing [m]
+        dY = (yvals_slice[-1] - yvals_slice[0]) / (len(yvals_slice) - 1)
         dY_scale = dY / l_scale
 
         # define horizontal and vertical input signals
@@ -93,98 +188,62 @@ def _prop_abcd_lct(laser_pulse, abcd_mat, l_scale):
         in_signal_2d_y = (dX_scale, dY_scale, Etot0_2d_y)
 
         # calculate 2D LCTs
-        dX_out, dY_out, out_signal_2d_x = rslct.apply_lct_2d_sep(
-            abcd_mat_cryst, abcd_mat_cryst, in_signal_2d_x
-        )
-        dX_out, dY_out, out_signal_2d_y = rslct.apply_lct_2d_sep(
-            abcd_mat_cryst, abcd_mat_cryst, in_signal_2d_y
-        )
+        lct_x, lct_y = _apply_lct_2d_xy(abcd_mat_cryst, in_signal_2d_x, in_signal_2d_y)
+        dX_out, dY_out, out_signal_2d_x = lct_x
+        dX_out, dY_out, out_signal_2d_y = lct_y
 
-        re_out_signal_2d_x = np.real(out_signal_2d_x)
-        x_total = (np.shape(re_out_signal_2d_x)[0] - 1) * dX_out
-        y_total = (np.shape(re_out_signal_2d_x)[1] - 1) * dY_out
-        xold = np.linspace(
-            -x_total / 2.0, x_total / 2.0, np.shape(re_out_signal_2d_x)[0]
-        )
-        yold = np.linspace(
-            -y_total / 2.0, y_total / 2.0, np.shape(re_out_signal_2d_x)[1]
-        )
+        nx_out, ny_out = np.shape(out_signal_2d_x)
+        x_total = (nx_out - 1) * dX_out
+        y_total = (ny_out - 1) * dY_out
+        xold = np.linspace(-x_total / 2.0, x_total / 2.0, nx_out)
+        yold = np.linspace(-y_total / 2.0, y_total / 2.0, ny_out)
 
         mesh_old_2 = {
-            "re_out_signal_2d_x": np.real(out_signal_2d_x),
-            "im_out_signal_2d_x": np.imag(out_signal_2d_x),
-            "re_out_signal_2d_y": np.real(out_signal_2d_y),
-            "im_out_signal_2d_y": np.imag(out_signal_2d_y),
+            "out_signal_2d_x": out_signal_2d_x,
+            "out_signal_2d_y": out_signal_2d_y,
         }
         xnew, ynew, mesh_new = _interp_to_odd(xold, yold, mesh_old_2)
 
-        if (
-            np.shape(re_out_signal_2d_x)[0] % 2 == 0
-            or np.shape(re_out_signal_2d_x)[1] % 2 == 0
-        ):
-            dX_out = np.mean(np.diff(xnew))
-            dY_out = np.mean(np.diff(ynew))
+        if nx_out % 2 == 0 or ny_out % 2 == 0:
+            dX_out = (xnew[-1] - xnew[0]) / (len(xnew) - 1)
+            dY_out = (ynew[-1] - ynew[0]) / (len(ynew) - 1)
 
-        out_signal_2d_x = (
-            mesh_new["re_out_signal_2d_x"] + 1j * mesh_new["im_out_signal_2d_x"]
-        )
-        out_signal_2d_y = (
-            mesh_new["re_out_signal_2d_y"] + 1j * mesh_new["im_out_signal_2d_y"]
-        )
+        out_signal_2d_x = mesh_new["out_signal_2d_x"]
+        out_signal_2d_y = mesh_new["out_signal_2d_y"]
 
         # extract propagated complex field and calculate corresponding x and y mesh arrays
         # we assume same mesh for both components of E_field
         hx = dX_out * l_scale
         hy = dY_out * l_scale
-        ny, nx = np.shape(out_signal_2d_x)
+        nx, ny = np.shape(out_signal_2d_x)
         local_xv = rslct.lct_abscissae(nx, hx)
         local_yv = rslct.lct_abscissae(ny, hy)
 
         # remake the wavefront
-        wfr_new = srwutil.make_wavefront(
-            np.real(out_signal_2d_x),
-            np.imag(out_signal_2d_x),
-            np.real(out_signal_2d_y),
-            np.imag(out_signal_2d_y),
+        wfr_new = srwutil.make_wavefront_from_complex(
+            out_signal_2d_x,
+            out_signal_2d_y,
             photon_e_ev,
-            np.linspace(np.min(local_xv), np.max(local_xv), nx),
-            np.linspace(np.min(local_xv), np.max(local_xv), ny),
+            local_xv,
+            local_yv,
         )
 
         return wfr_new
 
-    hc_ev_um = 1.23984198  # hc [eV*um]
-    for j in np.arange(nslices_pulse):
-        thisSlice = laser_pulse.slice[j]
-
-        phLambda = hc_ev_um / thisSlice.photon_e_ev * 1e-6
-        abcd_mat_cryst = np.array(
-            [
-                [abcd_mat.A, abcd_mat.B * phLambda / (l_scale**2)],
-                [abcd_mat.C / phLambda * (l_scale**2), abcd_mat.D],
-            ]
+    def _propagate_slice(thisSlice):
+        abcd_mat_cryst = _lct_abcd_mat(
+            abcd_mat.A,
+            abcd_mat.B,
+            abcd_mat.C,
+            abcd_mat.D,
+            thisSlice.photon_e_ev,
+            l_scale,
         )
-
-        wfr0 = thisSlice.wfr
         thisSlice.wfr = _wfr_prop_abcd_lct(
-            abcd_mat_cryst, l_scale, thisSlice.photon_e_ev, wfr0
+            abcd_mat_cryst, l_scale, thisSlice.photon_e_ev, thisSlice.wfr
         )
 
-        for k in np.arange(thisSlice.bw_nslice):
-            thisSubSlice = thisSlice.bandwidth_slice[k]
-
-            phLambda = hc_ev_um / thisSubSlice.photon_e_ev * 1e-6
-            abcd_mat_cryst = np.array(
-                [
-                    [abcd_mat.A, abcd_mat.B * phLambda / (l_scale**2)],
-                    [abcd_mat.C / phLambda * (l_scale**2), abcd_mat.D],
-                ]
-            )
-
-            wfr0 = thisSubSlice.wfr
-            thisSubSlice.wfr = _wfr_prop_abcd_lct(
-                abcd_mat_cryst, l_scale, thisSubSlice.photon_e_ev, wfr0
-            )
+    _for_each_slice(laser_pulse, _propagate_slice, parallel=True)
 
     laser_pulse.resize_laser_mesh()
     return laser_pulse
@@ -196,7 +255,7 @@ def _split_beam(laser_pulse, transmitted_fraction):
     def _wfr_split_beam(photon_e_ev, transmitted_fraction, wfr0):
 
         intensity_2d = srwutil.calc_int_from_elec(wfr0)
-        phase_1d = srwlib.array("d", [0] * wfr0.mesh.nx * wfr0.mesh.ny)
+        phase_1d = srwutil.zeros_array("d", wfr0.mesh.nx * wfr0.mesh.ny)
         srwl.CalcIntFromElecField(phase_1d, wfr0, 0, 4, 3, wfr0.mesh.eStart, 0, 0)
         phase_2d = (
             np.array(phase_1d)
@@ -225,18 +284,12 @@ def _split_beam(laser_pulse, transmitted_fraction):
 
         return wfr_new
 
-    for j in np.arange(laser_pulse.nslice):
-        thisSlice = laser_pulse.slice[j]
+    def _split_slice(thisSlice):
         thisSlice.n_photons_2d.mesh *= transmitted_fraction
         thisSlice.wfr = _wfr_split_beam(
             thisSlice.photon_e_ev, transmitted_fraction, thisSlice.wfr
         )
 
-        for k in np.arange(thisSlice.bw_nslice):
-            thisSubSlice = thisSlice.bandwidth_slice[k]
-            thisSubSlice.n_photons_2d.mesh *= transmitted_fraction
-            thisSubSlice.wfr = _wfr_split_beam(
-                thisSubSlice.photon_e_ev, transmitted_fraction, thisSubSlice.wfr
-            )
+    _for_each_slice(laser_pulse, _split_slice, parallel=False)
 
     return laser_pulse
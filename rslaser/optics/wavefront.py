@@ -2,6 +2,7 @@ import math
 from rslaser.utils.validator import ValidatorBase
 from rslaser.pulse import pulse
 import srwlib
+import rslaser.utils.srwl_uti_data as srwutil
 import numpy as np
 from srwlib import *
 import copy
@@ -40,8 +41,7 @@ class WavefrontSensor(ValidatorBase):
             )
         nslice = laser_pulse.nslice
         wflist = []
-        for slice_index in np.arange(nslice):
-            thisSlice = laser_pulse.slice[slice_index]
+        for slice_index, thisSlice in enumerate(laser_pulse.slice):
             # Now compute position of slice
             ds = 2 * laser_pulse.num_sig_trans * laser_pulse.sig_s / (nslice)
             slice_pos = (
@@ -56,8 +56,8 @@ class WavefrontSensor(ValidatorBase):
             wflist.append(thisSlice.wfr)
         # Now add wavefronts together
         wfr = copy.deepcopy(wflist[0])
-        for slice_index in np.arange(nslice - 1):
-            wfr.addE(wflist[slice_index + 1])
+        for w in wflist[1:]:
+            wfr.addE(w)
         return wfr
 
 
@@ -390,8 +390,8 @@ def rmsWavefrontIntensity(wfr):
     """
     #Compute rms values from a wavefront object
     """
-    IntensityArray2D = array(
-        "f", [0] * wfr.mesh.nx * wfr.mesh.ny
+    IntensityArray2D = srwutil.zeros_array(
+        "f", wfr.mesh.nx * wfr.mesh.ny
     )  # "flat" array to take 2D intensity data
     srwlib.srwl.CalcIntFromElecField(
         IntensityArray2D, wfr, 6, 0, 3, wfr.mesh.eStart, 0, 0
@@ -433,8 +433,8 @@ def maxWavefrontIntensity(wfr):
     """
     Compute maximum value of wavefront intensity
     """
-    IntensityArray2D = array(
-        "f", [0] * wfr.mesh.nx * wfr.mesh.ny
+    IntensityArray2D = srwutil.zeros_array(
+        "f", wfr.mesh.nx * wfr.mesh.ny
     )  # "flat" array to take 2D intensity data
     srwlib.srwl.CalcIntFromElecField(
         IntensityArray2D, wfr, 6, 0, 3, wfr.mesh.eStart, 0, 0
@@ -240,7 +240,7 @@ class LaserPulse(ValidatorBase):
 
             # extract the intensity and phase for all laser pulses
             intensity_2d = srwutil.calc_int_from_elec(wfr0)
-            phase_1d = srwlib.array("d", [0] * wfr0.mesh.nx * wfr0.mesh.ny)
+            phase_1d = srwutil.zeros_array("d", wfr0.mesh.nx * wfr0.mesh.ny)
             srwl.CalcIntFromElecField(phase_1d, wfr0, 0, 4, 3, wfr0.mesh.eStart, 0, 0)
             phase_2d = unwrap_phase(
                 np.array(phase_1d)
@@ -291,7 +291,7 @@ class LaserPulse(ValidatorBase):
                 photon_number[k + 1, j] = np.sum(thisSubSlice.n_photons_2d.mesh)
 
         def _extract_phase(j, k, photon_number, wfr0):
-            slice_phase_1d = srwlib.array("d", [0] * wfr0.mesh.nx * wfr0.mesh.ny)
+            slice_phase_1d = srwutil.zeros_array("d", wfr0.mesh.nx * wfr0.mesh.ny)
             srwlib.srwl.CalcIntFromElecField(
                 slice_phase_1d, wfr0, 0, 4, 3, wfr0.mesh.eStart, 0, 0
             )
@@ -410,13 +410,10 @@ class LaserPulse(ValidatorBase):
             new_x = x - pump_offset_x
             new_y = y - pump_offset_y
 
-            re_ex_2d, im_ex_2d, re_ey_2d, im_ey_2d = srwutil.extract_2d_fields(wfr0)
-
-            wfr = srwutil.make_wavefront(
-                re_ex_2d,
-                im_ex_2d,
-                re_ey_2d,
-                im_ey_2d,
+            # the fields are unchanged, only the mesh moves
+            wfr = srwutil.make_wavefront_from_interleaved(
+                wfr0.arEx,
+                wfr0.arEy,
                 photon_e_ev,
                 new_x,
                 new_y,
@@ -438,6 +435,47 @@ class LaserPulse(ValidatorBase):
                     thisSubSlice.wfr,
                 )
 
+    def shallow_wfr_copy(self):
+        """
+        Copy of the laser pulse for propagating independently of the original.
+        Only the per-slice wavefronts and photon meshes, which propagation
+        changes, are duplicated; all other attributes are shared.
+        """
+
+        def _copy_wfr(wfr0):
+            wfr = copy.copy(wfr0)
+            for k in (
+                "arEx",
+                "arEy",
+                "arMomX",
+                "arMomY",
+                "arElecPropMatr",
+                "arWfrAuxData",
+            ):
+                v = getattr(wfr0, k, None)
+                if v is not None:
+                    setattr(wfr, k, v[:])
+            wfr.mesh = copy.copy(wfr0.mesh)
+            wfr.partBeam = copy.deepcopy(wfr0.partBeam)
+            return wfr
+
+        def _copy_slice(slice0):
+            s = copy.copy(slice0)
+            s.wfr = _copy_wfr(slice0.wfr)
+            s.n_photons_2d = PKDict(slice0.n_photons_2d)
+            s.n_photons_2d.mesh = np.copy(slice0.n_photons_2d.mesh)
+            return s
+
+        laser_pulse = copy.copy(self)
+        laser_pulse._sxvals = list(self._sxvals)
+        laser_pulse._syvals = list(self._syvals)
+        laser_pulse.slice = []
+        for thisSlice in self.slice:
+            s = _copy_slice(thisSlice)
+            s.bandwidth_slice = [_copy_slice(b) for b in thisSlice.bandwidth_slice]
+            laser_pulse.slice.append(s)
+        return laser_pulse
+
     def combine_n2_variation(
         self,
         laser_pulse_copies,
@@ -455,8 +493,8 @@ class LaserPulse(ValidatorBase):
                 n2_0=srwutil.calc_int_from_elec(wfr_0),
             )
 
-            phase_1d_max = srwlib.array("d", [0] * wfr_max.mesh.nx * wfr_max.mesh.ny)
-            phase_1d_0 = srwlib.array("d", [0] * wfr_0.mesh.nx * wfr_0.mesh.ny)
+            phase_1d_max = srwutil.zeros_array("d", wfr_max.mesh.nx * wfr_max.mesh.ny)
+            phase_1d_0 = srwutil.zeros_array("d", wfr_0.mesh.nx * wfr_0.mesh.ny)
             srwl.CalcIntFromElecField(
                 phase_1d_max, wfr_max, 0, 4, 3, wfr_max.mesh.eStart, 0, 0
             )
@@ -574,19 +612,10 @@ class LaserPulse(ValidatorBase):
             self.pulse_direction = 0.0
 
         def _flip_fields(photon_e_ev, initial_laser_xy, wfr0):
-            re_ex_2d, im_ex_2d, re_ey_2d, im_ey_2d = srwutil.extract_2d_fields(wfr0)
-
-            # E_f (x,y) = E_i (-x,-y)
-            new_re_ex_2d = np.flip(re_ex_2d)
-            new_im_ex_2d = np.flip(im_ex_2d)
-            new_re_ey_2d = np.flip(re_ey_2d)
-            new_im_ey_2d = np.flip(im_ey_2d)
-
-            wfr = srwutil.make_wavefront(
-                new_re_ex_2d,
-                new_im_ex_2d,
-                new_re_ey_2d,
-                new_im_ey_2d,
+            # E_f (x,y) = E_i (-x,-y), i.e. the mesh points in reverse order
+            wfr = srwutil.make_wavefront_from_complex(
+                srwutil.complex_view(wfr0.arEx)[::-1],
+                srwutil.complex_view(wfr0.arEy)[::-1],
                 photon_e_ev,
                 initial_laser_xy.x,
                 initial_laser_xy.y,
@@ -612,19 +641,12 @@ class LaserPulse(ValidatorBase):
         # Manually zero the phase
         def _zero_wfr_phase(photon_e_ev, initial_laser_xy, wfr0):
 
-            re_ex_2d, im_ex_2d, re_ey_2d, im_ey_2d = srwutil.extract_2d_fields(wfr0)
-
-            new_re_ex_2d = np.sqrt(re_ex_2d**2.0 + im_ex_2d**2.0)
-            new_im_ex_2d = np.zeros(np.shape(new_re_ex_2d))
-            new_re_ey_2d = np.zeros(np.shape(new_re_ex_2d))
-            new_im_ey_2d = np.zeros(np.shape(new_re_ex_2d))
+            new_ex = np.abs(srwutil.complex_view(wfr0.arEx))
 
             # remake the wavefront
-            wfr = srwutil.make_wavefront(
-                new_re_ex_2d,
-                new_im_ex_2d,
-                new_re_ey_2d,
-                new_im_ey_2d,
+            wfr = srwutil.make_wavefront_from_complex(
+                new_ex,
+                np.zeros(np.shape(new_ex)),
                 photon_e_ev,
                 initial_laser_xy.x,
                 initial_laser_xy.y,
@@ -913,18 +935,9 @@ class LaserPulseSlice(ValidatorBase):
         self.pulseE_slice *= subslice_fraction
         self.n_photons_2d.mesh *= subslice_fraction
 
-        re0_2d_ex, im0_2d_ex, re0_2d_ey, im0_2d_ey = srwutil.extract_2d_fields(self.wfr)
-
-        re0_2d_ex *= np.sqrt(subslice_fraction)
-        im0_2d_ex *= np.sqrt(subslice_fraction)
-        re0_2d_ey *= np.sqrt(subslice_fraction)
-        im0_2d_ey *= np.sqrt(subslice_fraction)
-
-        self.wfr = srwutil.make_wavefront(
-            re0_2d_ex,
-            im0_2d_ex,
-            re0_2d_ey,
-            im0_2d_ey,
+        self.wfr = srwutil.make_wavefront_from_complex(
+            srwutil.complex_view(self.wfr.arEx) * np.sqrt(subslice_fraction),
+            srwutil.complex_view(self.wfr.arEy) * np.sqrt(subslice_fraction),
             self.photon_e_ev,
             self.initial_laser_xy.x,
             self.initial_laser_xy.y,
@@ -1186,18 +1199,9 @@ class BandwidthSlice(ValidatorBase):
         self.pulseE_slice *= subslice_fraction
         self.n_photons_2d.mesh *= subslice_fraction
 
-        re0_2d_ex, im0_2d_ex, re0_2d_ey, im0_2d_ey = srwutil.extract_2d_fields(self.wfr)
-
-        re0_2d_ex *= np.sqrt(subslice_fraction)
-        im0_2d_ex *= np.sqrt(subslice_fraction)
-        re0_2d_ey *= np.sqrt(subslice_fraction)
-        im0_2d_ey *= np.sqrt(subslice_fraction)
-
-        self.wfr = srwutil.make_wavefront(
-            re0_2d_ex,
-            im0_2d_ex,
-            re0_2d_ey,
-            im0_2d_ey,
+        self.wfr = srwutil.make_wavefront_from_complex(
+            srwutil.complex_view(self.wfr.arEx) * np.sqrt(subslice_fraction),
+            srwutil.complex_view(self.wfr.arEy) * np.sqrt(subslice_fraction),
             self.photon_e_ev,
             self.initial_laser_xy.x,
             self.initial_laser_xy.y,
@@ -4,10 +4,30 @@
 from fenics import *
 from h5py import File
 from mpmath import hyp2f2
-from scipy.optimize import curve_fit
 from mshr import Cylinder, generate_mesh
+from scipy.sparse import csr_matrix
 from scipy.special import gamma, gammaincc as GammaI, exp1
-from numpy import array, zeros, pi, exp, log, unique, diag, argsort, sin, cos, sinc
+from numpy import (
+    array,
+    allclose,
+    array_equal,
+    zeros,
+    pi,
+    exp,
+    log,
+    unique,
+    diag,
+    argsort,
+    sin,
+    cos,
+    sinc,
+    outer,
+    ones_like,
+    stack,
+    concatenate,
+    eye,
+)
+from numpy.linalg import lstsq
 
 set_log_level(30)
 
@@ -35,14 +55,14 @@ class ThermoOptic:
         "hog": "Q0*exp(-2*pow((x[0]*x[0]+x[1]*x[1])/(wp*wp),P/2.))*exp(-alpha*(x[2]-z0))",
     }
 
-    # Expressions for wavelength- & temperature-dependent indices of refraction
+    # Expressions for wavelength- & temperature-dependent indices of refraction (in Horner form)
     #   - n0 values (first terms) are from RP Photonics, www.rp-photonics.com/
     #   - nT expression for Al203 are from Tapping & Reilly (1986), doi:10.1364/JOSAA.3.000610
     #   - nT expression for NdYAG are from Brown (1998), doi:10.1109/3.736113
 
     INDICES = {
-        "Ti:Al2O3": lambda T: 1.75991 + 1.28e-5 * T + 3.1e-9 * T**2,
-        "NdYAG": lambda T: 1.82 + (-2.59e-6 + 2.61e-8 * T + 6.02e-11 * T**2) * T,
+        "Ti:Al2O3": lambda T: 1.75991 + (1.28e-5 + 3.1e-9 * T) * T,
+        "NdYAG": lambda T: 1.82 + (-2.59e-6 + (2.61e-8 + 6.02e-11 * T) * T) * T,
     }
 
     # Boundary condition types
@@ -63,7 +83,17 @@ class ThermoOptic:
         + "pump rep-rates higher than {:.1f} Hz".format(RATECUTOFFS[1]),
     }
 
-    __slots__ = ("mesh", "space", "crystal", "heat_load", "boundary", "eval_pts")
+    __slots__ = (
+        "mesh",
+        "space",
+        "crystal",
+        "heat_load",
+        "boundary",
+        "eval_pts",
+        "_boundary_key",
+        "_steady",
+        "_eval_matrix",
+    )
 
     def __init__(self, crystal, mesh_density=50):
 
@@ -96,6 +126,14 @@ class ThermoOptic:
         self.boundary = None
         self.eval_pts = array([])
 
+        # Steady-state solver, built on first use & reused while the boundary is unchanged
+        self._boundary_key = None
+        self._steady = None
+
+        # (solution space, sparse map from its dofs to values at the evaluation points),
+        # built on first use & kept while the points & space are unchanged
+        self._eval_matrix = None
+
     def _compute_volume(self, heat_load):
         """
         Computes the effective heat pumping volume in a crystal
@@ -216,10 +254,17 @@ class ThermoOptic:
         BC = self.BCTYPES[bc_type]
         if (not isinstance(bc_tol, float)) or (bc_tol <= 0):
             raise ValueError("'bc_tol' must be a float greater than zero")
+
+        # Keep the existing boundary (& any solver built on it) if none of its inputs changed
+        Tc = self.crystal.params.Tc
+        key = (bc_tol, bc_type, r0, Tc, self.space)
+        if self.boundary and self._boundary_key == key:
+            return
+        self._boundary_key = key
         boundary = lambda x, on_boundary: on_boundary and near(
             x[0] * x[0] + x[1] * x[1], r0 * r0, bc_tol
         )
-        self.boundary = BC(self.space, Constant(self.crystal.params.Tc), boundary)
+        self.boundary = BC(self.space, Constant(Tc), boundary)
 
     def set_points(self, npts, edge=0.98):
         """
@@ -248,19 +293,92 @@ class ThermoOptic:
         # Construct cylindrical grid of evaluation points
         rs = edge * r0 * array(range(1, nr + 1)) / (nr - 1)
         zs = edge * (-L / 2.0 + L * array(range(nz)) / (nz - 1))
+        pts = zeros((nz, nw * nr + 1 if nw else nr + 1, 3))
+        pts[:, :, 2] = zs[:, None]
         if nw:
             ws = 2.0 * pi * array(range(nw)) / nw
-            self.eval_pts = array(
-                [
-                    [[0.0, 0.0, z]]
-                    + [[r * cos(om), r * sin(om), z] for r in rs for om in ws]
-                    for z in zs
-                ]
-            ).reshape((nz * (nw * nr + 1), 3))
+            pts[:, 1:, 0] = outer(rs, cos(ws)).ravel()
+            pts[:, 1:, 1] = outer(rs, sin(ws)).ravel()
         else:
-            self.eval_pts = array(
-                [[[0.0, 0.0, z]] + [[r, 0.0, z] for r in rs] for z in zs]
-            ).reshape((nz * (nr + 1), 3))
+            pts[:, 1:, 0] = rs
+        # Keep the evaluation matrix if the points are unchanged (calc_n0n2 sets them before each solve)
+        pts = pts.reshape((-1, 3))
+        if not array_equal(pts, self.eval_pts):
+            self._eval_matrix = None
+        self.eval_pts = pts
+
+    def _evaluate(self, u):
+        """
+        Evaluates a FEniCS Function on the solution space at all evaluation points
+
+        The basis function weights of every evaluation point are found once & stored as a
+        sparse matrix, so each evaluation is a single product with the dof values; the
+        matrix is reused until the evaluation points or the solution space change. The
+        product reads the process-local dof values, so it is only used in serial, & only
+        once it reproduces a linear function at every point; otherwise u(pt) is used
+
+        Args:
+        * `u`- FEniCS Function to evaluate
+        """
+
+        if self._eval_matrix is None or self._eval_matrix[0] is not self.space:
+            self._eval_matrix = (self.space, self._eval_weights())
+        if self._eval_matrix[1] is None:
+            return array([u(pt) for pt in self.eval_pts])
+        return self._eval_matrix[1] @ u.vector().get_local()
+
+    def _eval_weights(self):
+        """
+        Builds the sparse basis function weights of the evaluation points, or None if not usable
+        """
+
+        # get_local() holds only this process's dofs, so the weights are serial only
+        if MPI.size(self.mesh.mpi_comm()) > 1:
+            return None
+        try:
+            tree = self.mesh.bounding_box_tree()
+            element = self.space.element()
+            dofmap = self.space.dofmap()
+            rows, cols, weights = [], [], []
+            for i, pt in enumerate(self.eval_pts):
+                cell_id = tree.compute_first_entity_collision(Point(*pt))
+                if cell_id >= self.mesh.num_cells():
+                    return None
+                cell = Cell(self.mesh, cell_id)
+                dofs = dofmap.cell_dofs(cell_id)
+                rows.extend([i] * len(dofs))
+                cols.extend(dofs)
+                weights.extend(
+                    element.evaluate_basis_all(
+                        pt, cell.get_vertex_coordinates(), cell.orientation()
+                    )
+                )
+            m = csr_matrix(
+                (weights, (rows, cols)),
+                shape=(len(self.eval_pts), self.space.dim()),
+            )
+            # P1 elements reproduce a linear function exactly, at every point
+            c = array([1.0, -2.0, 3.0])
+            f = interpolate(
+                Expression(
+                    "c0*x[0] + c1*x[1] + c2*x[2] + 1.0",
+                    c0=c[0],
+                    c1=c[1],
+                    c2=c[2],
+                    degree=1,
+                ),
+                self.space,
+            )
+            if not allclose(
+                m @ f.vector().get_local(),
+                self.eval_pts @ c + 1.0,
+                rtol=1.0e-10,
+                atol=1.0e-10,
+            ):
+                return None
+        except Exception:
+            return None
+        return m
 
     def solve_time(
         self, runtime, dt=1e-3, load_off=None, save=False, path="./T-crystal.h5"
@@ -293,7 +411,7 @@ class ThermoOptic:
 
         # Set initial temperature state
         T = interpolate(self.crystal.params.Tc, self.space)
-        Ts[0, :] = array([T(pt) for pt in self.eval_pts])
+        Ts[0, :] = self._evaluate(T)
 
         # Initialize variational variables used by FEniCS
         u = TrialFunction(self.space)
@@ -314,7 +432,7 @@ class ThermoOptic:
         for n in range(1, load_off):
             solve(Fl == Fr, T_solve, self.boundary)
             T.assign(T_solve)
-            Ts[n, :] = [T(pt) for pt in self.eval_pts]
+            Ts[n, :] = self._evaluate(T)
 
         # Solve the differential equation without thermal loading for remaining steps (if any)
         if load_off < Nt:
@@ -323,7 +441,7 @@ class ThermoOptic:
             for n in range(load_off, Nt):
                 solve(Fl == Fr, T_solve, self.boundary)
                 T.assign(T_solve)
-                Ts[n, :] = [T(pt) for pt in self.eval_pts]
+                Ts[n, :] = self._evaluate(T)
 
         # Return temperature field, saving if requested
         if save:
@@ -331,13 +449,20 @@ class ThermoOptic:
                 h5File.create_dataset(data=Ts)
         return Ts
 
-    def solve_steady(self, save=False, path="./T-crystal.h5"):
+    def solve_steady(self, save=False, path="./T-crystal.h5", linear_solver="lu"):
         """
         Solves the steady state (time-independent) heat equation for the Crystal.
 
         Given in Eqn. 2.1.1 (without time term) in Chenais et al (2006), doi:10.1016/j.pquantelec.2006.12.001
+
+        Args:
+        * `linear_solver`- "lu" (default) for the direct solve, or "cg" for CG with algebraic multigrid
         """
 
+        # Validate choice of linear solver
+        if linear_solver not in ("lu", "cg"):
+            raise ValueError("'linear_solver' must be either 'lu' or 'cg'")
+
         # Validate interoperability of Crystal and solve_steady method
         if self.crystal.params.pop_inversion_pump_rep_rate < self.RATECUTOFFS[1]:
             raise RuntimeError(self.RATEERRORS["toolow"].format("solve_steady"))
@@ -348,18 +473,18 @@ class ThermoOptic:
                 "must set heat load, boundary conditions, & evaluation points prior to simulation"
             )
 
-        # Set FEniCS log & define shortnames for useful quantities
+        # Set FEniCS log & build (or reuse) the steady-state solver
         set_log_level(50)
-        f = self.heat_load
-
-        # Initialize variational variables used by FEniCS
-        u = Function(self.space)
-        v = TestFunction(self.space)
+        if self._steady is None or self._steady[:2] != (self.boundary, linear_solver):
+            self._steady = (self.boundary, linear_solver) + self._steady_solver(
+                linear_solver
+            )
+        _, _, load, u, solver = self._steady
 
-        # Define time-independent differential equation for temperature
-        F = dot(grad(u), grad(v)) * dx - f * v * dx
-        solve(F == 0.0, u, self.boundary)
-        Ts = array([u(pt) for pt in self.eval_pts])
+        # Project the heat load onto the solution space & solve for the temperature
+        load.interpolate(self.heat_load)
+        solver.solve()
+        Ts = self._evaluate(u)
 
         # Return temperature field, saving if requested
         if save:
@@ -367,6 +492,35 @@ class ThermoOptic:
                 h5File.create_dataset(data=Ts)
         return Ts
 
+    def _steady_solver(self, linear_solver):
+        """
+        Builds the linear steady state heat equation problem & its solver
+
+        The forms are compiled once; the heat load enters through a coefficient Function,
+        so new loads do not trigger recompilation. The system is symmetric positive definite,
+        so besides LU it may be solved with CG preconditioned by algebraic multigrid.
+        """
+
+        # Initialize variational variables used by FEniCS
+        load = Function(self.space)
+        u = Function(self.space)
+        T = TrialFunction(self.space)
+        v = TestFunction(self.space)
+
+        # Define time-independent differential equation for temperature
+        a = dot(grad(T), grad(v)) * dx
+        Lf = load * v * dx
+        solver = LinearVariationalSolver(
+            LinearVariationalProblem(a, Lf, u, self.boundary)
+        )
+        solver.parameters["linear_solver"] = linear_solver
+        if linear_solver == "cg":
+            solver.parameters["preconditioner"] = (
+                "hypre_amg" if has_krylov_solver_preconditioner("hypre_amg") else "amg"
+            )
+            solver.parameters["krylov_solver"]["relative_tolerance"] = 1.0e-10
+        return load, u, solver
+
     def slow_solution(self, heat_load, save=False, path="./T-crystal.h5"):
         """
         Computes a solution to the steady state heat equation given a low pump rep-rate
@@ -568,12 +722,15 @@ class ThermoOptic:
         # Evaluate the analytical steady state solution for a Gaussian heat load
         a = 2.0 / order
         hyp1 = r0**2 * float(hyp2f2(a, a, a + 1, a + 1, -2 * (r0 / wp) ** order))
+        # Every longitudinal slice repeats the same radial points, so the (scalar, mpmath)
+        # hypergeometric function only needs evaluating once per distinct radius
+        r_unique, r_index = unique(rs, return_inverse=True)
         hyp2 = array(
             [
                 r**2 * float(hyp2f2(a, a, a + 1, a + 1, -2 * (r / wp) ** order))
-                for r in rs
+                for r in r_unique
             ]
-        )
+        )[r_index]
         Trz = (
             etah
             * (Pabs / etaAbs)
@@ -620,24 +777,27 @@ class ThermoOptic:
         # Compute refractive index values analytically
         nT = self.INDICES[material](Ts)
 
+        # Evaluation points are laid out slice by slice, with the same radial points
+        # in every slice (see set_points), so one radial mask serves all slices
+        nT_z = nT.reshape((len(zs), -1))
+        rs_z = rs[: nT_z.shape[1]]
+
         # Initialize fitted values of n0/n2
         n0 = zeros(len(zs))
         n2 = zeros(len(zs))
 
         # For sufficiently high rep-rates, get quadratic Taylor series fits to refractive index curves
         if self.crystal.params.pop_inversion_pump_rep_rate >= 100.0:
-            for z in range(len(zs)):
-                in_fit = (self.eval_pts[:, 2] / 1.0e2 == zs[z]) * (abs(rs) <= fit_width)
-                pfit, varfit = curve_fit(
-                    lambda r, n0, n2: n0 - 0.5 * n2 * r**2.0, rs[in_fit], nT[in_fit]
-                )
-                n0[z], n2[z] = pfit
+            in_fit = abs(rs_z) <= fit_width
+            # n0 - 0.5 * n2 * r**2 is linear in (n0, n2): solve the least squares fits
+            # of all slices directly, as one right-hand side column per slice
+            r_fit = rs_z[in_fit]
+            M = stack((ones_like(r_fit), -0.5 * r_fit**2.0), axis=1)
+            n0[:], n2[:] = lstsq(M, nT_z[:, in_fit].T, rcond=None)[0]
 
         # For sufficiently low rep-rates, compute average refractive indices along the central axis
         elif self.crystal.params.pop_inversion_pump_rep_rate <= 1.0:
-            for z in range(len(zs)):
-                in_fit = self.eval_pts[:, 2] / 1.0e2 == zs[z]
-                n0[z] = nT[in_fit].mean()
+            n0[:] = nT_z.mean(axis=1)
 
         # For invalid rep-rates, alert the user to an issue
         else:
@@ -664,21 +824,23 @@ class ThermoOptic:
         nz = len(set(self.eval_pts[:, 2]))
         dz = self.crystal.length / nz
 
-        # Compute ABCD matrices at each longitudinal point
+        # Compute ABCD matrices at all longitudinal points at once
+        n0 = array(n0s[:nz], dtype=float)
+        gamma = (array(n2s[:nz], dtype=float) / n0) ** 0.5
         ABCDs = zeros((nz, 2, 2))
-        for z in range(nz):
-            n0 = n0s[z]
-            n2 = n2s[z]
-            gamma = (n2 / n0) ** 0.5
-            ABCDs[z] = [
-                [cos(gamma * dz), dz * sinc(gamma * dz / pi)],
-                [-n0 * gamma * sin(gamma * dz), cos(gamma * dz)],
-            ]
-
-        # Compute total ABCD matrix
-        full_ABCD = ABCDs[-1].copy()
-        for ABCD in ABCDs[-2::-1]:
-            full_ABCD = full_ABCD @ ABCD
+        ABCDs[:, 0, 0] = cos(gamma * dz)
+        ABCDs[:, 0, 1] = dz * sinc(gamma * dz / pi)
+        ABCDs[:, 1, 0] = -n0 * gamma * sin(gamma * dz)
+        ABCDs[:, 1, 1] = ABCDs[:, 0, 0]
+
+        # Compute total ABCD matrix, ABCDs[-1] @ ... @ ABCDs[0], by multiplying
+        # neighboring pairs with one batched matmul per level (log2(nz) levels)
+        full_ABCD = ABCDs[::-1]
+        while len(full_ABCD) > 1:
+            if len(full_ABCD) % 2:
+                full_ABCD = concatenate((full_ABCD, eye(2)[None]))
+            full_ABCD = full_ABCD[0::2] @ full_ABCD[1::2]
+        full_ABCD = full_ABCD[0]
 
         # Return ABCD matrices, saving if requested
         if save:
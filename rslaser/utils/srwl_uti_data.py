@@ -148,7 +148,7 @@ def calc_int_from_wfr(_wfr, _pol=6, _int_type=0, _det=None, _fname="", _pr=True)
     if depType < 0:
         Exception("Incorrect numbers of points in the mesh structure")
 
-    arI = srwlib.array(sNumTypeInt, [0] * resMeshI.ne * resMeshI.nx * resMeshI.ny)
+    arI = zeros_array(sNumTypeInt, resMeshI.ne * resMeshI.nx * resMeshI.ny)
     srwl.CalcIntFromElecField(
         arI,
         _wfr,
@@ -327,12 +327,8 @@ def calc_int_from_elec(_wfr):
     )
 
     # reshape to 2d mesh
-    elec_fields_re = (
-        np.array(re0).reshape((_wfr.mesh.ny, -1), order="C").astype(np.float64)
-    )
-    elec_fields_im = (
-        np.array(im0).reshape((_wfr.mesh.ny, -1), order="C").astype(np.float64)
-    )
+    elec_fields_re = _srw_array_to_2d(re0, (_wfr.mesh.ny, -1))
+    elec_fields_im = _srw_array_to_2d(im0, (_wfr.mesh.ny, -1))
 
     # calculate intensity
     slice_intensity = (
@@ -364,54 +360,91 @@ def extract_2d_fields(_wfr):
     )
 
     # Reshape arrays from 1d to 2d
-    re_ex_2d = (
-        np.array(re0_ex)
-        .reshape((_wfr.mesh.nx, _wfr.mesh.ny), order="C")
-        .astype(np.float64)
-    )
-    im_ex_2d = (
-        np.array(im0_ex)
-        .reshape((_wfr.mesh.nx, _wfr.mesh.ny), order="C")
-        .astype(np.float64)
-    )
-    re_ey_2d = (
-        np.array(re0_ey)
-        .reshape((_wfr.mesh.nx, _wfr.mesh.ny), order="C")
-        .astype(np.float64)
-    )
-    im_ey_2d = (
-        np.array(im0_ey)
-        .reshape((_wfr.mesh.nx, _wfr.mesh.ny), order="C")
-        .astype(np.float64)
-    )
+    shape = (_wfr.mesh.nx, _wfr.mesh.ny)
+    re_ex_2d = _srw_array_to_2d(re0_ex, shape)
+    im_ex_2d = _srw_array_to_2d(im0_ex, shape)
+    re_ey_2d = _srw_array_to_2d(re0_ey, shape)
+    im_ey_2d = _srw_array_to_2d(im0_ey, shape)
 
     return re_ex_2d, im_ex_2d, re_ey_2d, im_ey_2d
 
 
+def complex_field(re_2d, im_2d):
+    # assemble re + 1j * im without the intermediate complex temporary
+    field = np.empty(np.shape(re_2d), dtype=np.complex128)
+    field.real = re_2d
+    field.imag = im_2d
+    return field
+
+
+def zeros_array(typecode, n):
+    # zero-filled array of n elements, without building a Python list of n zeros
+    return array(typecode, bytes(array(typecode).itemsize * n))
+
+
+def _as_bytes(values, dtype):
+    # contiguous values of dtype, exposed as raw bytes without a copy when possible
+    return memoryview(np.ascontiguousarray(values, dtype=dtype)).cast("B")
+
+
+def complex_view(ar):
+    # an SRW float32 field array (arEx/arEy) reinterpreted as complex64, without copying
+    return np.frombuffer(ar, dtype=np.complex64)
+
+
+def field_pairs(ar):
+    # (re, im) pairs of an SRW field array (arEx/arEy), one row per mesh point, as a view
+    return np.frombuffer(ar, dtype=np.dtype(ar.typecode)).reshape((-1, 2))
+
+
+def _srw_array_to_2d(ar, shape):
+    # view the SRW array buffer directly instead of converting it element by element
+    return (
+        np.frombuffer(ar, dtype=np.dtype(ar.typecode))
+        .reshape(shape, order="C")
+        .astype(np.float64)
+    )
+
+
 def make_wavefront(ex_re_2d, ex_im_2d, ey_re_2d, ey_im_2d, photon_e_ev, x, y):
 
     # Flatten fields
-    re_ex = ex_re_2d.flatten(order="C")
-    im_ex = ex_im_2d.flatten(order="C")
-    re_ey = ey_re_2d.flatten(order="C")
-    im_ey = ey_im_2d.flatten(order="C")
+    re_ex = np.ravel(ex_re_2d, order="C")
+    im_ex = np.ravel(ex_im_2d, order="C")
+    re_ey = np.ravel(ey_re_2d, order="C")
+    im_ey = np.ravel(ey_im_2d, order="C")
 
     # Combine real and imaginary fields into srw-preferred format
-    ex_numpy = np.array((re_ex, im_ex)).T.ravel()
-    # ex_numpy = np.zeros(2 * len(re_ex))
-    # for i in range(len(re_ex)):
-    #     ex_numpy[2 * i] = re_ex[i]
-    #     ex_numpy[2 * i + 1] = im_ex[i]
-
-    ey_numpy = np.array((re_ey, im_ey)).T.ravel()
-    # ey_numpy = np.zeros(2 * len(re_ey))
-    # for i in range(len(re_ey)):
-    #     ey_numpy[2 * i] = re_ey[i]
-    #     ey_numpy[2 * i + 1] = im_ey[i]
-
-    # Convert to list
-    ex = array("f", ex_numpy.tolist())
-    ey = array("f", ey_numpy.tolist())
+    ex_numpy = np.empty(2 * re_ex.size, dtype=np.float32)
+    ex_numpy[0::2] = re_ex
+    ex_numpy[1::2] = im_ex
+
+    ey_numpy = np.empty(2 * re_ey.size, dtype=np.float32)
+    ey_numpy[0::2] = re_ey
+    ey_numpy[1::2] = im_ey
+
+    return make_wavefront_from_interleaved(ex_numpy, ey_numpy, photon_e_ev, x, y)
+
+
+def make_wavefront_from_complex(ex_2d, ey_2d, photon_e_ev, x, y):
+    # complex64 is laid out as interleaved float32 (re, im) pairs, which is
+    # exactly the SRW field format, so the pack is a single cast + view
+    return make_wavefront_from_interleaved(
+        np.ascontiguousarray(ex_2d, dtype=np.complex64).view(np.float32),
+        np.ascontiguousarray(ey_2d, dtype=np.complex64).view(np.float32),
+        photon_e_ev,
+        x,
+        y,
+    )
+
+
+def make_wavefront_from_interleaved(ex_numpy, ey_numpy, photon_e_ev, x, y):
+
+    # Copy the (re, im) interleaved buffers straight into float32 SRW arrays
+    ex = array("f")
+    ex.frombytes(_as_bytes(ex_numpy, np.float32))
+    ey = array("f")
+    ey.frombytes(_as_bytes(ey_numpy, np.float32))
 
     # Pass changes to SRW
     wfr1 = srwlib.SRWLWfr(
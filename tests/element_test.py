@@ -123,6 +123,236 @@ def test_prop_with_gain():
         _prop(prop_type)
 
 
+def test_propagate_lct_mesh():
+    from rslaser.utils import srwl_uti_data as srwutil
+
+    photon_e_ev = 1.5
+    abcd = element._lct_abcd_mat(
+        0.99765495, 1.41975385, -0.0023775, 0.99896716, photon_e_ev, 1e-3
+    )
+
+    def _wfr(x, y):
+        e = numpy.exp(-((x[:, None] / 4e-4) ** 2) - (y[None, :] / 7e-4) ** 2).astype(
+            numpy.complex64
+        )
+        w = srwutil.make_wavefront_from_complex(e, e, photon_e_ev, x, y)
+        pykern.pkunit.pkeq(
+            (x[0], x[-1], len(x), y[0], y[-1], len(y)),
+            (
+                w.mesh.xStart,
+                w.mesh.xFin,
+                w.mesh.nx,
+                w.mesh.yStart,
+                w.mesh.yFin,
+                w.mesh.ny,
+            ),
+        )
+        return crystal._propagate_lct(1e-3, abcd, photon_e_ev, w).mesh
+
+    # nx != ny with asymmetric x, y ranges, and the same wavefront transposed
+    x = numpy.linspace(-1.5e-3, 1.0e-3, 33)
+    y = numpy.linspace(-2.0e-3, 3.0e-3, 41)
+    m = _wfr(x, y)
+    t = _wfr(y, x)
+    pykern.pkunit.pkeq((m.nx, m.ny), (t.ny, t.nx))
+    pykern.pkunit.pkok(m.nx != m.ny, "nx={} ny={} collapsed", m.nx, m.ny)
+    pykern.pkunit.pkok(
+        numpy.isclose(m.yStart, -m.yFin, rtol=1e-12, atol=0),
+        "y mesh=({}, {}) is not centered",
+        m.yStart,
+        m.yFin,
+    )
+    # the y extent comes from the y abscissae, not the x ones
+    pykern.pkunit.pkok(
+        numpy.allclose(
+            (m.yStart, m.yFin, m.xStart, m.xFin),
+            (t.xStart, t.xFin, t.yStart, t.yFin),
+            rtol=1e-12,
+            atol=0,
+        )
+        and not numpy.isclose(m.yFin - m.yStart, m.xFin - m.xStart),
+        "y extent={} does not follow the y abscissae",
+        (m.yStart, m.yFin),
+    )
+
+
+def test_cross_section_fn():
+    import scipy.interpolate
+
+    s = crystal.Crystal(PKDict(nslice=1)).slice[0]
+    w = numpy.linspace(600e-9, 1050e-9, 101)
+    # cross_section_fn stays a splrep tck, evaluated in calc_gain by CubicSpline
+    pykern.pkunit.pkok(
+        numpy.allclose(
+            scipy.interpolate.splev(w, s.cross_section_fn),
+            crystal._CRYSTAL_CROSS_SECTION_FN(w),
+            rtol=1e-12,
+            atol=1e-12 * 4.8e-23,
+        ),
+        "splev of cross_section_fn differs from the CubicSpline",
+    )
+
+
+def test_parallel_slices():
+    def _prop():
+        c = crystal.Crystal(PKDict(nslice=2, n0=[1.75, 1.75], n2=[16.0, 12.0]))
+        p = pulse.LaserPulse(PKDict(nslice=3, nx_slice=32))
+        c.propagate(p, "n0n2_lct")
+        return [
+            numpy.array(a)
+            for s in p.slice
+            for w in [s.wfr] + [b.wfr for b in s.bandwidth_slice]
+            for a in (w.arEx, w.arEy)
+        ]
+
+    element.set_max_threads(4)
+    try:
+        parallel = _prop()
+        element.set_max_threads(1)
+        serial = _prop()
+    finally:
+        element.set_max_threads(1)
+    pykern.pkunit.pkeq(len(serial), len(parallel))
+    for a, e in zip(parallel, serial):
+        pykern.pkunit.pkok(
+            numpy.array_equal(a, e), "parallel fields differ from serial fields"
+        )
+    with pykern.pkunit.pkexcept(element.ElementException, "max_threads"):
+        element.set_max_threads(0)
+
+
+def test_n0n2_abcd_override():
+    s = crystal.Crystal(PKDict(nslice=1, n0=[1.75], n2=[16.0])).slice[0]
+    m = s._n0n2_abcd()
+    o = s._n0n2_abcd(0.0)
+    pykern.pkunit.pkeq((1.0, s.length, 0.0, 1.0), (o.A, o.B, o.C, o.D))
+    pykern.pkunit.pkok(
+        s._n0n2_abcd() is m and m.A != 1.0,
+        "override n2 replaced the cached slice ABCD",
+    )
+
+    def _fields(p):
+        w = p.slice_wfr(0)
+        return numpy.array(w.arEx), numpy.array(w.arEy)
+
+    # override_n2=0 propagates like a slice with n2 = 0
+    for prop_type in ("n0n2_srw", "n0n2_lct"):
+        p = pulse.LaserPulse(PKDict(nx_slice=32))
+        s.propagate(p, prop_type, override_n2=0.0)
+        p0 = pulse.LaserPulse(PKDict(nx_slice=32))
+        crystal.Crystal(PKDict(nslice=1, n0=[1.75], n2=[0.0])).slice[0].propagate(
+            p0, prop_type
+        )
+        for a, e in zip(_fields(p), _fields(p0)):
+            pykern.pkunit.pkok(
+                numpy.array_equal(a, e),
+                "{} override_n2=0 differs from n2=0",
+                prop_type,
+            )
+    with pykern.pkunit.pkexcept(element.ElementException, "override_n2"):
+        s.propagate(pulse.LaserPulse(), "abcd_lct", override_n2=0.0)
+
+
+def test_interpolate_a_to_b():
+    from scipy.interpolate import RectBivariateSpline
+
+    c = crystal.CrystalSlice()
+    e = c.population_inversion.mesh_extent * 1.15
+    n = c.population_inversion.n_cells
+    r_cutoff = e - 0.9 * 2.0 * e / n
+    pop_x = numpy.linspace(-e, e, n)
+    # wavefront mesh smaller than the pop_inversion mesh, with nx != ny
+    wfr_x = numpy.linspace(-0.6 * e, 0.5 * e, 40)
+    wfr_y = numpy.linspace(-0.55 * e, 0.7 * e, 47)
+    c.pop_inversion_mesh = numpy.random.default_rng(1).random((n, n))
+
+    def _expect(a_x, a_y, mesh, b_x, b_y):
+        res = RectBivariateSpline(a_x, a_y, mesh)(b_x, b_y)
+        x, y = numpy.meshgrid(b_x, b_y, indexing="ij")
+        res[numpy.sqrt(x**2 + y**2) > r_cutoff] = 0.0
+        return res
+
+    def _check(expect, actual):
+        pykern.pkunit.pkok(
+            numpy.allclose(actual, expect, rtol=0, atol=1e-12 * numpy.max(expect)),
+            "interpolated mesh differs from RectBivariateSpline by {}",
+            numpy.max(numpy.abs(actual - expect)),
+        )
+
+    w = PKDict(
+        mesh=PKDict(
+            xStart=wfr_x[0],
+            xFin=wfr_x[-1],
+            nx=len(wfr_x),
+            yStart=wfr_y[0],
+            yFin=wfr_y[-1],
+            ny=len(wfr_y),
+        )
+    )
+    _check(
+        _expect(pop_x, pop_x, c.pop_inversion_mesh, wfr_x, wfr_y),
+        c._interpolate_a_to_b("pop_inversion", w),
+    )
+    # wfr -> pop_inversion, where the target extends past the source
+    a = PKDict(
+        mesh=numpy.random.default_rng(2).random((len(wfr_x), len(wfr_y))),
+        x=wfr_x,
+        y=wfr_y,
+    )
+    _check(
+        _expect(wfr_x, wfr_y, a.mesh, pop_x, pop_x),
+        c._interpolate_a_to_b(a, "pop_inversion"),
+    )
+
+
+def test_energy_gain_limits():
+    # epsilon -> 0 limit is e^beta
+    beta = numpy.array([[0.0, 0.3], [2.0, 5.0]])
+    g = crystal._energy_gain(numpy.full(beta.shape, 1.0e-12), beta)
+    pykern.pkunit.pkok(
+        numpy.allclose(g, numpy.exp(beta), rtol=1e-9, atol=0),
+        "small epsilon gain={} != e^beta",
+        g,
+    )
+    # photon-free pixels get the limit too, capped so the scaled fields stay finite
+    beta = numpy.array([[0.0, 0.3, 50.0], [2.0, 5.0, 800.0]])
+    g = crystal._energy_gain(numpy.zeros(beta.shape), beta)
+    pykern.pkunit.pkok(
+        numpy.array_equal(g[:, :2], numpy.exp(beta[:, :2]))
+        and numpy.all(numpy.isfinite(numpy.sqrt(g, dtype=numpy.float32))),
+        "zero epsilon gain={} != e^beta",
+        g,
+    )
+    # large epsilon limit is 1 + beta / epsilon
+    epsilon = numpy.full(beta.shape, 1.0e4)
+    g = crystal._energy_gain(epsilon, beta)
+    pykern.pkunit.pkok(
+        numpy.allclose(g, 1.0 + beta / epsilon, rtol=1e-14, atol=0),
+        "large epsilon gain={} != 1 + beta/epsilon",
+        g,
+    )
+
+
+def test_energy_gain_float128():
+    if numpy.finfo(numpy.longdouble).maxexp <= numpy.finfo(numpy.float64).maxexp:
+        pytest.skip("no extended precision long double")
+    # pixels past the float64 exp range included, where float128 is still finite
+    epsilon = numpy.array([[1.0e-3, 1.0, 50.0, 650.0], [705.0, 800.0, 3.0, 5.0e3]])
+    beta = numpy.array([[0.3, 690.0, 800.0, 60.0], [1.0e-8, 800.0, 1.2e3, 4.0e3]])
+    g = crystal._energy_gain(epsilon, beta)
+    # the original float128 evaluation
+    e = numpy.longdouble(epsilon)
+    b = numpy.longdouble(beta)
+    expect = (1.0 / e) * numpy.log(1.0 + numpy.exp(b) * (numpy.exp(e) - 1.0))
+    pykern.pkunit.pkok(
+        numpy.all(numpy.isfinite(g))
+        and numpy.allclose(g, numpy.float64(expect), rtol=1e-14, atol=0),
+        "gain={} != float128 gain={}",
+        g,
+        expect,
+    )
+
+
 def test_instantiation03():
     lens.Drift_srw(0.01)
 
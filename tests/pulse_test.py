@@ -129,6 +129,38 @@ def test_instantiation():
         pulse.LaserPulse(PKDict(foo="bar", hello="world"))
 
 
+def test_shallow_wfr_copy():
+    from rslaser.utils import srwl_uti_data as srwutil
+
+    p = pulse.LaserPulse(PKDict(nslice=2, nx_slice=32))
+    c = p.shallow_wfr_copy()
+
+    def _slices(laser_pulse):
+        for s in laser_pulse.slice:
+            yield s
+            yield from s.bandwidth_slice
+
+    for s0, s1 in zip(_slices(p), _slices(c)):
+        e = PKDict(
+            arEx=np.array(s0.wfr.arEx),
+            arEy=np.array(s0.wfr.arEy),
+            n_photons=np.copy(s0.n_photons_2d.mesh),
+        )
+        pykern.pkunit.pkeq(e.arEx.tolist(), np.array(s1.wfr.arEx).tolist())
+        # in-place changes to the copy, as calc_gain makes, leave the original alone
+        srwutil.field_pairs(s1.wfr.arEx)[...] *= 2.0
+        srwutil.field_pairs(s1.wfr.arEy)[...] *= 2.0
+        s1.n_photons_2d.mesh *= 2.0
+        for k, a in (
+            ("arEx", s0.wfr.arEx),
+            ("arEy", s0.wfr.arEy),
+            ("n_photons", s0.n_photons_2d.mesh),
+        ):
+            pykern.pkunit.pkok(
+                np.array_equal(e[k], np.array(a)), "copy {} aliases the original", k
+            )
+
+
 # TODO (gurhar1133): propagation is a work in progress.
 # def test_cavity_propagation():
 #     from pykern import pkunit
@@ -0,0 +1,104 @@
+"""Tests for ThermoOptic
+"""
+from pykern.pkcollections import PKDict
+import pykern.pkunit
+import pytest
+import numpy
+
+fenics = pytest.importorskip("fenics")
+pytest.importorskip("mshr")
+
+
+def _sim(mesh_density=12):
+    from rslaser.optics import crystal
+    from rslaser.thermal import ThermoOptic
+
+    return ThermoOptic(crystal.Crystal(PKDict(nslice=4)), mesh_density)
+
+
+def test_evaluate():
+    s = _sim()
+    s.set_points((100, 3, 4), edge=0.9)
+    u = fenics.interpolate(
+        fenics.Expression("x[0]*x[0] - 2*x[1] + x[0]*x[2] + 3", degree=2), s.space
+    )
+    # the (tetrahedral) mesh cells go through cell.orientation() & evaluate_basis_all
+    pykern.pkunit.pkok(
+        numpy.allclose(
+            s._evaluate(u),
+            numpy.array([u(pt) for pt in s.eval_pts]),
+            rtol=0,
+            atol=1e-12,
+        ),
+        "sparse evaluation differs from u(pt)",
+    )
+    m = s._eval_matrix
+    pykern.pkunit.pkok(m[1] is not None, "serial evaluation fell back to u(pt)")
+    s.set_points((100, 3, 4), edge=0.9)
+    s._evaluate(u)
+    pykern.pkunit.pkok(s._eval_matrix is m, "unchanged points rebuilt the matrix")
+    s.set_points((100, 0, 4), edge=0.9)
+    pykern.pkunit.pkeq(len(s.eval_pts), s._evaluate(u).size)
+    pykern.pkunit.pkok(s._eval_matrix is not m, "changed points kept the matrix")
+
+
+def test_solve_steady():
+    s = _sim()
+    s.set_points((100, 0, 4), edge=0.9)
+    bc_tol = 2.0 * s.crystal.radius * (s.crystal.radius / 40.0) * 1.0e4
+    s.set_boundary(bc_tol)
+    s.set_load("gaussian")
+    actual = s.solve_steady()
+    cg = s.solve_steady(linear_solver="cg")
+    # the Newton solve the reused linear solvers replaced
+    u = fenics.Function(s.space)
+    v = fenics.TestFunction(s.space)
+    fenics.solve(
+        fenics.dot(fenics.grad(u), fenics.grad(v)) * fenics.dx
+        - s.heat_load * v * fenics.dx
+        == 0.0,
+        u,
+        s.boundary,
+        solver_parameters={"newton_solver": {"linear_solver": "lu"}},
+    )
+    expect = numpy.array([u(pt) for pt in s.eval_pts])
+    pykern.pkunit.pkok(
+        numpy.allclose(actual, expect, rtol=0, atol=1e-10 * numpy.ptp(expect)),
+        "LU temperatures differ from the Newton solve by {}",
+        numpy.max(numpy.abs(actual - expect)),
+    )
+    pykern.pkunit.pkok(
+        numpy.allclose(cg, expect, rtol=0, atol=1e-7 * numpy.ptp(expect)),
+        "CG temperatures differ from LU by {}",
+        numpy.max(numpy.abs(cg - expect)),
+    )
+    with pykern.pkunit.pkexcept(ValueError, "linear_solver"):
+        s.solve_steady(linear_solver="gmres")
+
+    b = s.boundary
+    s.set_boundary(bc_tol)
+    pykern.pkunit.pkok(s.boundary is b, "unchanged inputs rebuilt the boundary")
+    s.crystal.params.Tc += 10.0
+    s.set_boundary(bc_tol)
+    pykern.pkunit.pkok(s.boundary is not b, "changed Tc kept the boundary")
+    pykern.pkunit.pkok(
+        numpy.allclose(s.solve_steady() - actual, 10.0, rtol=0, atol=1e-6),
+        "changed Tc did not shift the temperatures",
+    )
+
+
+def test_calc_n0n2_reuse():
+    from rslaser.optics import crystal
+
+    c = crystal.Crystal(PKDict(nslice=4))
+    c.calc_n0n2(mesh_density=12)
+    s = c._thermo_optic.sim
+    c.calc_n0n2(mesh_density=12)
+    pykern.pkunit.pkok(c._thermo_optic.sim is s, "unchanged inputs rebuilt the mesh")
+    c.radius *= 0.5
+    c.calc_n0n2(mesh_density=12)
+    pykern.pkunit.pkok(c._thermo_optic.sim is not s, "changed radius kept the mesh")
+    s = c._thermo_optic.sim
+    c.length *= 2.0
+    c.calc_n0n2(mesh_density=12)
+    pykern.pkunit.pkok(c._thermo_optic.sim is not s, "changed length kept the mesh")